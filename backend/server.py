@@ -1,18 +1,32 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, UpdateOne, UpdateMany, DeleteOne, ASCENDING, DESCENDING, GEOSPHERE, TEXT
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
 import os
 import logging
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any
 import uuid
+import base64
+import hashlib
+import json
+import math
+import re
+import time
+import unicodedata
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
 import httpx
+from cachetools import TTLCache, LRUCache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,6 +41,68 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'helpmynew-secret-key-2024')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 168  # 7 days
 
+# Auth caches: per-process, so keep the TTL short enough that other workers catch up
+AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', '10000'))
+AUTH_CACHE_TTL_SECONDS = int(os.environ.get('AUTH_CACHE_TTL_SECONDS', '60'))
+
+# Translation cache: in-memory LRU in front of the `translations` collection
+TRANSLATION_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', '20000'))
+TRANSLATION_CACHE_TTL_DAYS = int(os.environ.get('TRANSLATION_CACHE_TTL_DAYS', '30'))
+
+# Translation batching: misses arriving within the window share one LLM call
+TRANSLATION_BATCH_WINDOW_MS = int(os.environ.get('TRANSLATION_BATCH_WINDOW_MS', '25'))
+TRANSLATION_BATCH_MAX_SEGMENTS = int(os.environ.get('TRANSLATION_BATCH_MAX_SEGMENTS', '20'))
+
+# Message translation workers
+TRANSLATION_WORKERS = int(os.environ.get('TRANSLATION_WORKERS', '4'))
+TRANSLATION_QUEUE_SIZE = int(os.environ.get('TRANSLATION_QUEUE_SIZE', '1000'))
+TRANSLATION_MAX_ATTEMPTS = int(os.environ.get('TRANSLATION_MAX_ATTEMPTS', '3'))
+# Messages still pending after this long (restart, full queue) are queued again
+TRANSLATION_RETRY_SECONDS = int(os.environ.get('TRANSLATION_RETRY_SECONDS', '120'))
+# Languages every message is translated into up front, on top of sender's and receiver's
+MESSAGE_FANOUT_LANGUAGES = [l.strip() for l in os.environ.get('MESSAGE_FANOUT_LANGUAGES', 'es,en').split(',') if l.strip()]
+# How long get_messages waits on missing translations before returning what it has
+LAZY_TRANSLATION_TIMEOUT_SECONDS = float(os.environ.get('LAZY_TRANSLATION_TIMEOUT_SECONDS', '3'))
+
+# Category catalog: rebuilt on writes here, and at least this often to pick up other workers' writes
+CATEGORY_CATALOG_TTL_SECONDS = int(os.environ.get('CATEGORY_CATALOG_TTL_SECONDS', '300'))
+
+# Provider geo search
+PROVIDER_SEARCH_RADIUS_KM = float(os.environ.get('PROVIDER_SEARCH_RADIUS_KM', '25'))
+# Nearest providers considered for ranking in a geo search, and the deepest page served
+PROVIDER_RANK_CANDIDATES = int(os.environ.get('PROVIDER_RANK_CANDIDATES', '1000'))
+PROVIDER_MAX_RESULTS = int(os.environ.get('PROVIDER_MAX_RESULTS', '500'))
+
+# Real-time pub/sub: "memory" (single worker) or "mongo" (change streams, needs a replica set)
+MESSAGE_BUS = os.environ.get('MESSAGE_BUS', 'memory')
+MESSAGE_BUS_SUBSCRIBER_QUEUE = int(os.environ.get('MESSAGE_BUS_SUBSCRIBER_QUEUE', '100'))
+
+# Password hashing pool: bcrypt releases the GIL, so threads run hashes in parallel
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '256'))
+
+# Stripe webhook events: logged, acked, then applied by background workers
+PAYMENT_EVENT_WORKERS = int(os.environ.get('PAYMENT_EVENT_WORKERS', '2'))
+PAYMENT_EVENT_QUEUE_SIZE = int(os.environ.get('PAYMENT_EVENT_QUEUE_SIZE', '1000'))
+PAYMENT_EVENT_MAX_ATTEMPTS = int(os.environ.get('PAYMENT_EVENT_MAX_ATTEMPTS', '5'))
+# Events still unprocessed after this long (crash, full queue, error) are picked up again
+PAYMENT_EVENT_RETRY_SECONDS = int(os.environ.get('PAYMENT_EVENT_RETRY_SECONDS', '60'))
+
+# How long a pending checkout status from Stripe is reused across polls
+PAYMENT_STATUS_CACHE_SECONDS = float(os.environ.get('PAYMENT_STATUS_CACHE_SECONDS', '3'))
+
+# Availability calendar: how far ahead providers can publish slots, and how long past days are kept
+AVAILABILITY_HORIZON_DAYS = int(os.environ.get('AVAILABILITY_HORIZON_DAYS', '90'))
+AVAILABILITY_RETENTION_DAYS = int(os.environ.get('AVAILABILITY_RETENTION_DAYS', '7'))
+
+# Shared outbound HTTP client (OAuth) and concurrency cap for LLM calls
+OUTBOUND_HTTP_TIMEOUT_SECONDS = float(os.environ.get('OUTBOUND_HTTP_TIMEOUT_SECONDS', '10'))
+OUTBOUND_HTTP_MAX_CONNECTIONS = int(os.environ.get('OUTBOUND_HTTP_MAX_CONNECTIONS', '100'))
+OUTBOUND_HTTP_MAX_KEEPALIVE = int(os.environ.get('OUTBOUND_HTTP_MAX_KEEPALIVE', '20'))
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '16'))
+
+EMERGENT_AUTH_SESSION_URL = "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+
 # Create the main app
 app = FastAPI(title="Help My New API")
 
@@ -107,9 +183,20 @@ class Message(BaseModel):
     receiver_id: str
     content: str
     translated_content: Optional[Dict[str, str]] = None
+    translation_status: str = "done"  # pending, done, failed
     read: bool = False
     created_at: datetime
 
+class Review(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    review_id: str
+    request_id: str
+    provider_id: str
+    client_id: str
+    rating: int  # 1-5
+    comment: Optional[str] = None
+    created_at: datetime
+
 class PaymentTransaction(BaseModel):
     model_config = ConfigDict(extra="ignore")
     transaction_id: str
@@ -123,6 +210,166 @@ class PaymentTransaction(BaseModel):
     status: str = "pending"  # pending, completed, failed, refunded
     created_at: datetime
 
+# ============ DATABASE INDEXES ============
+
+# App language code -> MongoDB text search language (stemming + stop words).
+# Covers the languages of the seeded categories; anything else is indexed unstemmed.
+TEXT_SEARCH_LANGUAGES = {
+    "es": "spanish",
+    "en": "english",
+    "fr": "french",
+    "de": "german",
+    "it": "italian",
+    "pt": "portuguese",
+}
+
+def text_search_language(language: Optional[str]) -> str:
+    return TEXT_SEARCH_LANGUAGES.get((language or "").lower()[:2], "none")
+
+# collection -> indexes matching the query shapes used by the routes below
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "providers": [
+        IndexModel([("provider_id", ASCENDING)], name="provider_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("categories", ASCENDING), ("availability", ASCENDING)], name="categories_availability"),
+        IndexModel([("postal_code", ASCENDING), ("availability", ASCENDING)], name="postal_code_availability"),
+        IndexModel([("availability", ASCENDING)], name="availability"),
+        IndexModel([("location", GEOSPHERE)], name="location_2dsphere"),
+        IndexModel([("categories", ASCENDING), ("rank_score", DESCENDING)], name="categories_rank_score"),
+        IndexModel([("rank_score", DESCENDING)], name="rank_score"),
+        IndexModel(
+            [("bio", TEXT), ("services.name", TEXT), ("services.description", TEXT)],
+            name="text_search",
+            weights={"services.name": 5, "services.description": 2, "bio": 1},
+            default_language="none",
+            language_override="text_language"
+        ),
+    ],
+    "categories": [
+        IndexModel([("category_id", ASCENDING)], name="category_id_unique", unique=True),
+    ],
+    "requests": [
+        IndexModel([("request_id", ASCENDING)], name="request_id_unique", unique=True),
+        # One index per $or branch of get_requests, each ending in its (created_at, request_id) sort
+        IndexModel(
+            [("client_id", ASCENDING), ("created_at", DESCENDING), ("request_id", DESCENDING)],
+            name="client_id_created_at_request_id"
+        ),
+        IndexModel(
+            [("provider_id", ASCENDING), ("created_at", DESCENDING), ("request_id", DESCENDING)],
+            name="provider_id_created_at_request_id"
+        ),
+        IndexModel(
+            [("client_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("request_id", DESCENDING)],
+            name="client_id_status_created_at_request_id"
+        ),
+        IndexModel(
+            [("provider_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("request_id", DESCENDING)],
+            name="provider_id_status_created_at_request_id"
+        ),
+        IndexModel(
+            [("title", TEXT), ("description", TEXT)],
+            name="text_search",
+            weights={"title": 3, "description": 1},
+            default_language="none",
+            language_override="text_language"
+        ),
+    ],
+    "messages": [
+        IndexModel([("message_id", ASCENDING)], name="message_id_unique", unique=True),
+        IndexModel(
+            [("request_id", ASCENDING), ("created_at", ASCENDING), ("message_id", ASCENDING)],
+            name="request_id_created_at_message_id"
+        ),
+        IndexModel([("receiver_id", ASCENDING), ("read", ASCENDING), ("request_id", ASCENDING)], name="receiver_id_read"),
+        IndexModel(
+            [("created_at", ASCENDING)],
+            name="pending_translation_created_at",
+            partialFilterExpression={"translation_status": "pending"}
+        ),
+    ],
+    "reviews": [
+        IndexModel([("review_id", ASCENDING)], name="review_id_unique", unique=True),
+        # One review per service request
+        IndexModel([("request_id", ASCENDING)], name="request_id_unique", unique=True),
+        IndexModel(
+            [("provider_id", ASCENDING), ("created_at", DESCENDING), ("review_id", DESCENDING)],
+            name="provider_id_created_at_review_id"
+        ),
+    ],
+    "conversations": [
+        IndexModel([("user_id", ASCENDING), ("request_id", ASCENDING)], name="user_id_request_id_unique", unique=True),
+        IndexModel(
+            [("user_id", ASCENDING), ("updated_at", DESCENDING), ("request_id", DESCENDING)],
+            name="user_id_updated_at_request_id"
+        ),
+    ],
+    "translations": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel(
+            [("created_at", ASCENDING)],
+            name="created_at_ttl",
+            expireAfterSeconds=TRANSLATION_CACHE_TTL_DAYS * 86400
+        ),
+    ],
+    "message_events": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=3600),
+    ],
+    "availability_slots": [
+        IndexModel([("provider_id", ASCENDING), ("day", ASCENDING)], name="provider_id_day_unique", unique=True),
+        # Fields of the same array compound under $elemMatch, so category, start
+        # and end are all bounded by the index
+        IndexModel(
+            [("day", ASCENDING), ("slots.category_id", ASCENDING), ("slots.start", ASCENDING), ("slots.end", ASCENDING)],
+            name="day_slots"
+        ),
+        IndexModel(
+            [("date", ASCENDING)],
+            name="date_ttl",
+            expireAfterSeconds=AVAILABILITY_RETENTION_DAYS * 86400
+        ),
+    ],
+    "earnings_rollups": [
+        IndexModel(
+            [("dimension", ASCENDING), ("key", ASCENDING), ("period", ASCENDING), ("period_start", ASCENDING)],
+            name="dimension_key_period_period_start_unique",
+            unique=True
+        ),
+        IndexModel(
+            [("dimension", ASCENDING), ("period", ASCENDING), ("period_start", DESCENDING), ("total", DESCENDING)],
+            name="dimension_period_period_start_total"
+        ),
+    ],
+    "stripe_events": [
+        IndexModel([("event_key", ASCENDING)], name="event_key_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("received_at", ASCENDING)], name="status_received_at"),
+    ],
+    "payment_transactions": [
+        IndexModel([("transaction_id", ASCENDING)], name="transaction_id_unique", unique=True),
+        IndexModel(
+            [("session_id", ASCENDING)],
+            name="session_id_unique",
+            unique=True,
+            partialFilterExpression={"session_id": {"$type": "string"}}
+        ),
+    ],
+}
+
+async def ensure_indexes():
+    """Create every index in INDEXES. Safe to run on each startup: existing
+    indexes with the same spec are left untouched."""
+    for collection, indexes in INDEXES.items():
+        try:
+            names = await db[collection].create_indexes(indexes)
+            logging.info(f"Indexes ready on {collection}: {', '.join(names)}")
+        except OperationFailure as e:
+            # Conflicting spec or duplicate keys; keep serving and surface it in the logs
+            logging.error(f"Index build failed on {collection}: {e}")
+
 # ============ AUTH HELPERS ============
 
 def hash_password(password: str) -> str:
@@ -131,6 +378,37 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+password_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+password_pool_stats = {"in_flight": 0, "queued": 0, "max_queued": 0, "completed": 0, "rejected": 0}
+
+async def run_password_job(fn, *args):
+    """Run a bcrypt call on the password pool so it never blocks the event loop.
+
+    At most PASSWORD_HASH_WORKERS jobs run at once; callers beyond that wait
+    in line, and once PASSWORD_HASH_MAX_QUEUE are waiting new ones get a 503."""
+    stats = password_pool_stats
+    if stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+    stats["queued"] += 1
+    stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+    waiting = True
+    try:
+        async with password_slots:
+            stats["queued"] -= 1
+            waiting = False
+            stats["in_flight"] += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(password_executor, fn, *args)
+            finally:
+                stats["in_flight"] -= 1
+                stats["completed"] += 1
+    finally:
+        if waiting:
+            stats["queued"] -= 1
+
 def create_token(user_id: str, email: str, role: str) -> str:
     payload = {
         "user_id": user_id,
@@ -140,6 +418,47 @@ def create_token(user_id: str, email: str, role: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)  # token -> decoded payload
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)  # user_id -> user doc
+auth_cache_stats = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0}
+
+def decode_token(token: str) -> Optional[Dict]:
+    """Decode and verify a JWT, reusing earlier verifications of the same token"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        # A cached token can still expire while it sits in the cache
+        if payload["exp"] <= datetime.now(timezone.utc).timestamp():
+            token_cache.pop(token, None)
+            return None
+        auth_cache_stats["token_hits"] += 1
+        return payload
+
+    auth_cache_stats["token_misses"] += 1
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.InvalidTokenError:
+        # Includes ExpiredSignatureError
+        return None
+    token_cache[token] = payload
+    return payload
+
+async def load_user(user_id: str) -> Optional[Dict]:
+    user = user_cache.get(user_id)
+    if user is not None:
+        auth_cache_stats["user_hits"] += 1
+        return dict(user)
+
+    auth_cache_stats["user_misses"] += 1
+    user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+    if user:
+        user_cache[user_id] = user
+        return dict(user)
+    return None
+
+def invalidate_user(user_id: str):
+    """Drop a cached user doc; call after every write to db.users"""
+    user_cache.pop(user_id, None)
+
 async def get_current_user(request: Request, credentials = Depends(security)) -> Optional[Dict]:
     token = None
     
@@ -153,42 +472,504 @@ async def get_current_user(request: Request, credentials = Depends(security)) ->
     if not token:
         return None
     
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user = await db.users.find_one({"user_id": payload["user_id"]}, {"_id": 0})
-        return user
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
+    payload = decode_token(token)
+    if not payload:
         return None
+    return await load_user(payload["user_id"])
 
 async def require_auth(user = Depends(get_current_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
     return user
 
+# ============ OUTBOUND CLIENTS ============
+
+# One pooled client for the whole process, so repeated calls to the same host
+# reuse kept-alive connections instead of paying a TCP + TLS handshake each time
+http_client: Optional[httpx.AsyncClient] = None
+
+def http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional h2 package is installed
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def create_http_client(verify: Any = True) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=http2_available(),
+        verify=verify,
+        timeout=httpx.Timeout(OUTBOUND_HTTP_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=OUTBOUND_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=OUTBOUND_HTTP_MAX_KEEPALIVE
+        )
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = create_http_client()
+    return http_client
+
+# StripeCheckout only holds configuration, so one instance per webhook URL is reused.
+# The URL comes from the request's Host header, so the cache is bounded.
+stripe_clients = LRUCache(maxsize=16)  # "api_key:webhook_url" -> StripeCheckout
+
+def get_stripe_checkout(webhook_url: str = ""):
+    from emergentintegrations.payments.stripe.checkout import StripeCheckout
+    
+    api_key = os.environ.get('STRIPE_API_KEY')
+    if not api_key:
+        raise HTTPException(status_code=500, detail="Stripe not configured")
+    
+    key = f"{api_key}:{webhook_url}"
+    stripe_checkout = stripe_clients.get(key)
+    if stripe_checkout is None:
+        stripe_checkout = stripe_clients[key] = StripeCheckout(api_key=api_key, webhook_url=webhook_url)
+    return stripe_checkout
+
+# LlmChat keeps per-session message history, so it can't be shared between
+# unrelated translations; instead the number of calls in flight is capped
+llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
 # ============ TRANSLATION SERVICE ============
 
+translation_cache = LRUCache(maxsize=TRANSLATION_CACHE_SIZE)
+translation_cache_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+def translation_key(text: str, target_language: str, source_language: str = "auto") -> str:
+    """Cache key from the normalized text hash plus the language pair"""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    text_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    return f"{source_language.lower()}:{target_language.lower()}:{text_hash}"
+
 async def translate_text(text: str, target_language: str, source_language: str = "auto") -> str:
-    """Translate text using OpenAI via Emergent LLM Key"""
+    """Translate text, falling back to the original if the LLM is unavailable"""
+    translated = await lookup_or_translate(text, target_language, source_language)
+    return translated if translated is not None else text
+
+async def lookup_or_translate(text: str, target_language: str, source_language: str = "auto") -> Optional[str]:
+    """Translate text, answering repeats from the translation cache; None on failure"""
+    key = translation_key(text, target_language, source_language)
+
+    cached = await cached_translation(key)
+    if cached is not None:
+        return cached
+    return await translate_miss(key, text, target_language, source_language)
+
+async def translate_to_languages(text: str, languages: List[str], source_language: str = "auto") -> Dict[str, Optional[str]]:
+    """Translate one text into several languages, sending all cache misses in one LLM call"""
+    languages = list(dict.fromkeys(languages))
+    keys = {lang: translation_key(text, lang, source_language) for lang in languages}
+    cached = await asyncio.gather(*(cached_translation(keys[lang]) for lang in languages))
+    results = dict(zip(languages, cached))
+
+    missing = [lang for lang in languages if results[lang] is None]
+    # Languages this text is already on its way to the LLM for; share those calls
+    shared = {lang: translation_inflight[keys[lang]] for lang in missing if keys[lang] in translation_inflight}
+    missing = [lang for lang in missing if lang not in shared]
+
+    if len(missing) == 1:
+        lang = missing[0]
+        results[lang] = await translate_miss(keys[lang], text, lang, source_language)
+    elif missing:
+        translation_cache_stats["misses"] += len(missing)
+        loop = asyncio.get_running_loop()
+        futures = {lang: loop.create_future() for lang in missing}
+        for lang, future in futures.items():
+            translation_inflight[keys[lang]] = future
+        try:
+            fanned_out = await request_fanout_translation(text, missing)
+            for lang in missing:
+                results[lang] = fanned_out.get(lang)
+                futures[lang].set_result(results[lang])
+            for lang in missing:
+                if results[lang] is not None:
+                    await store_translation(keys[lang], source_language, lang, results[lang])
+        finally:
+            for lang, future in futures.items():
+                translation_inflight.pop(keys[lang], None)
+                if not future.done():
+                    future.set_result(None)
+
+    translation_batch_stats["coalesced"] += len(shared)
+    for lang, future in shared.items():
+        results[lang] = await asyncio.shield(future)
+
+    return results
+
+async def cached_translation(key: str) -> Optional[str]:
+    cached = translation_cache.get(key)
+    if cached is not None:
+        translation_cache_stats["memory_hits"] += 1
+        return cached
+
+    doc = await db.translations.find_one({"key": key}, {"_id": 0, "translated": 1})
+    if doc:
+        translation_cache_stats["db_hits"] += 1
+        translation_cache[key] = doc["translated"]
+        return doc["translated"]
+    return None
+
+async def store_translation(key: str, source_language: str, target_language: str, translated: str):
+    translation_cache[key] = translated
+    await db.translations.update_one(
+        {"key": key},
+        {"$setOnInsert": {
+            "key": key,
+            "source_language": source_language,
+            "target_language": target_language,
+            "translated": translated,
+            # BSON date, not an ISO string, so the TTL index can expire it
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+
+async def translate_miss(key: str, text: str, target_language: str, source_language: str) -> Optional[str]:
+    inflight = translation_inflight.get(key)
+    if inflight is not None:
+        # Same text and target already on its way to the LLM; share that result
+        translation_batch_stats["coalesced"] += 1
+        return await asyncio.shield(inflight)
+
+    translation_cache_stats["misses"] += 1
+    future = asyncio.get_running_loop().create_future()
+    translation_inflight[key] = future
+    try:
+        translated = await batched_translation(text, target_language)
+        if translated is not None:
+            # Never cache failures
+            await store_translation(key, source_language, target_language, translated)
+        future.set_result(translated)
+        return translated
+    finally:
+        translation_inflight.pop(key, None)
+        if not future.done():
+            future.set_result(None)
+
+translation_inflight: Dict[str, asyncio.Future] = {}
+# target language -> segments waiting for the current batch window to close
+translation_batches: Dict[str, List[tuple]] = {}
+translation_tasks: set = set()
+translation_batch_stats = {"llm_calls": 0, "segments": 0, "coalesced": 0, "batch_fallbacks": 0}
+
+async def batched_translation(text: str, target_language: str) -> Optional[str]:
+    """Queue text into the open batch for target_language and wait for its result"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    batch = translation_batches.get(target_language)
+    if batch is None:
+        batch = translation_batches[target_language] = []
+        loop.call_later(TRANSLATION_BATCH_WINDOW_MS / 1000, schedule_translation_flush, target_language, batch)
+    batch.append((text, future))
+    if len(batch) >= TRANSLATION_BATCH_MAX_SEGMENTS:
+        schedule_translation_flush(target_language, batch)
+
+    return await future
+
+def schedule_translation_flush(target_language: str, batch: List[tuple]):
+    # The window timer may fire after a size-triggered flush already took this batch
+    if translation_batches.get(target_language) is not batch:
+        return
+    del translation_batches[target_language]
+    task = asyncio.create_task(flush_translation_batch(target_language, batch))
+    translation_tasks.add(task)
+    task.add_done_callback(translation_tasks.discard)
+
+async def flush_translation_batch(target_language: str, batch: List[tuple]):
+    try:
+        results = await request_batch_translation([text for text, _ in batch], target_language)
+    except Exception as e:
+        logging.error(f"Batch translation error: {e}")
+        results = [None] * len(batch)
+    for (_, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result)
+
+async def request_batch_translation(texts: List[str], target_language: str) -> List[Optional[str]]:
+    """Translate several segments in one LLM call, split back by position"""
+    if len(texts) == 1:
+        return [await request_translation(texts[0], target_language)]
+
+    system_message = (
+        f"You are a translator. Translate each string in the JSON array to {target_language}. "
+        "Respond only with a JSON array of the translations, in the same order and of the same length."
+    )
+    response = await call_llm(system_message, json.dumps(texts, ensure_ascii=False), len(texts))
+    if response is not None:
+        try:
+            translations = json.loads(response)
+            if isinstance(translations, list) and len(translations) == len(texts):
+                return [str(t).strip() for t in translations]
+        except ValueError:
+            pass
+
+    # Malformed batch answer; translate the segments one by one instead
+    translation_batch_stats["batch_fallbacks"] += 1
+    return list(await asyncio.gather(*(request_translation(text, target_language) for text in texts)))
+
+async def request_fanout_translation(text: str, languages: List[str]) -> Dict[str, str]:
+    """Translate one text into several languages in one LLM call; failed languages are omitted"""
+    system_message = (
+        f"You are a translator. Translate the user's text into each of these languages: {', '.join(languages)}. "
+        "Respond only with a JSON object mapping each language code to its translation."
+    )
+    response = await call_llm(system_message, text, len(languages))
+    if response is None:
+        return {}
+    try:
+        translations = json.loads(response)
+    except ValueError:
+        translation_batch_stats["batch_fallbacks"] += 1
+        return {}
+    if not isinstance(translations, dict):
+        translation_batch_stats["batch_fallbacks"] += 1
+        return {}
+    return {lang: str(translations[lang]).strip() for lang in languages if translations.get(lang)}
+
+async def request_translation(text: str, target_language: str) -> Optional[str]:
+    """Translate text using OpenAI via Emergent LLM Key; None if the call fails"""
+    system_message = f"You are a translator. Translate the following text to {target_language}. Only respond with the translation, nothing else."
+    return await call_llm(system_message, text, 1)
+
+async def call_llm(system_message: str, text: str, segments: int) -> Optional[str]:
     try:
         from emergentintegrations.llm.chat import LlmChat, UserMessage
         
         api_key = os.environ.get('EMERGENT_LLM_KEY')
         if not api_key:
-            return text
+            return None
         
         chat = LlmChat(
             api_key=api_key,
             session_id=f"translate-{uuid.uuid4().hex[:8]}",
-            system_message=f"You are a translator. Translate the following text to {target_language}. Only respond with the translation, nothing else."
+            system_message=system_message
         ).with_model("openai", "gpt-4o-mini")
         
-        response = await chat.send_message(UserMessage(text=text))
+        translation_batch_stats["llm_calls"] += 1
+        translation_batch_stats["segments"] += segments
+        async with llm_slots:
+            response = await chat.send_message(UserMessage(text=text))
         return response.strip()
     except Exception as e:
         logging.error(f"Translation error: {e}")
-        return text
+        return None
+
+# ============ TRANSLATION WORKERS ============
+
+# Messages are stored untranslated and filled in here, so send_message never waits on the LLM
+translation_queue: asyncio.Queue = asyncio.Queue(maxsize=TRANSLATION_QUEUE_SIZE)
+translation_worker_tasks: List[asyncio.Task] = []
+# message_ids queued or being translated in this process, so the sweeper leaves them alone
+translation_queued: set = set()
+translation_worker_stats = {"enqueued": 0, "completed": 0, "retries": 0, "failed": 0, "dropped": 0, "requeued": 0}
+
+def enqueue_message_translation(message_id: str, request_id: str, content: str, languages: List[str]) -> bool:
+    """Queue a message for background translation; False if the queue is full"""
+    try:
+        translation_queue.put_nowait({
+            "message_id": message_id,
+            "request_id": request_id,
+            "content": content,
+            "languages": languages
+        })
+    except asyncio.QueueFull:
+        translation_worker_stats["dropped"] += 1
+        return False
+    translation_queued.add(message_id)
+    translation_worker_stats["enqueued"] += 1
+    return True
+
+async def process_translation_job(job: Dict):
+    languages = list(job["languages"])
+    for attempt in range(1, TRANSLATION_MAX_ATTEMPTS + 1):
+        results = await translate_to_languages(job["content"], languages)
+        update = {f"translated_content.{lang}": text for lang, text in results.items() if text is not None}
+        languages = [lang for lang, text in results.items() if text is None]
+
+        if not languages:
+            update["translation_status"] = "done"
+        if update:
+            await db.messages.update_one({"message_id": job["message_id"]}, {"$set": update})
+            await message_bus.publish(request_channel(job["request_id"]), {
+                "type": "translation",
+                "message_id": job["message_id"],
+                "translated_content": {lang: text for lang, text in results.items() if text is not None}
+            })
+        if not languages:
+            translation_worker_stats["completed"] += 1
+            return
+
+        if attempt < TRANSLATION_MAX_ATTEMPTS:
+            translation_worker_stats["retries"] += 1
+            await asyncio.sleep(2 ** (attempt - 1))
+
+    translation_worker_stats["failed"] += 1
+    await db.messages.update_one({"message_id": job["message_id"]}, {"$set": {"translation_status": "failed"}})
+
+async def message_languages(sender: Optional[Dict], receiver_id: str) -> List[str]:
+    """Receiver's and sender's preferred languages, then the fan-out ones"""
+    languages = []
+    receiver = await load_user(receiver_id)
+    if receiver and receiver.get("preferred_language"):
+        languages.append(receiver["preferred_language"])
+    if sender and sender.get("preferred_language"):
+        languages.append(sender["preferred_language"])
+    return list(dict.fromkeys(languages + MESSAGE_FANOUT_LANGUAGES))
+
+async def requeue_pending_translations() -> int:
+    """One sweep: queue again messages still pending after TRANSLATION_RETRY_SECONDS
+    that this process isn't already working on"""
+    room = TRANSLATION_QUEUE_SIZE - translation_queue.qsize()
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=TRANSLATION_RETRY_SECONDS)).isoformat()
+    requeued = 0
+    async for msg in db.messages.find(
+        {"translation_status": "pending", "created_at": {"$lt": cutoff}},
+        {"_id": 0, "message_id": 1, "request_id": 1, "sender_id": 1, "receiver_id": 1, "content": 1}
+    ).limit(max(room, 1) + len(translation_queued)):
+        if msg["message_id"] in translation_queued:
+            # Still waiting behind a backlog, not lost
+            continue
+        languages = await message_languages(await load_user(msg["sender_id"]), msg["receiver_id"])
+        if not enqueue_message_translation(msg["message_id"], msg["request_id"], msg["content"], languages):
+            break
+        requeued += 1
+    translation_worker_stats["requeued"] += requeued
+    return requeued
+
+async def translation_sweeper():
+    """Re-queue messages left pending because the queue was lost (restart,
+    deploy) or full when they were sent"""
+    while True:
+        try:
+            await requeue_pending_translations()
+        except PyMongoError as e:
+            logging.error(f"Translation sweep error: {e}")
+        await asyncio.sleep(TRANSLATION_RETRY_SECONDS)
+
+async def translation_worker():
+    while True:
+        job = await translation_queue.get()
+        try:
+            await process_translation_job(job)
+        except Exception as e:
+            logging.error(f"Translation worker error for {job['message_id']}: {e}")
+        finally:
+            translation_queued.discard(job["message_id"])
+            translation_queue.task_done()
+
+# ============ REAL-TIME MESSAGE BUS ============
+
+class InProcessMessageBus:
+    """Fans events out to WebSocket subscribers in this process only"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, set] = {}
+        self.dropped = 0
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=MESSAGE_BUS_SUBSCRIBER_QUEUE)
+        self.subscribers.setdefault(channel, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(channel)
+        if queues:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[channel]
+
+    def deliver(self, channel: str, event: Dict):
+        for queue in self.subscribers.get(channel, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client; it can catch up with get_messages(after=...)
+                self.dropped += 1
+
+    async def publish(self, channel: str, event: Dict):
+        self.deliver(channel, event)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+class MongoChangeStreamBus(InProcessMessageBus):
+    """Publishes through the message_events collection; every worker tails it
+    with a change stream and delivers to its own subscribers. Requires a
+    replica set (a single-node `mongod --replSet rs0` is enough locally)."""
+
+    def __init__(self):
+        super().__init__()
+        self.task: Optional[asyncio.Task] = None
+        self.resume_token = None
+
+    async def publish(self, channel: str, event: Dict):
+        await db.message_events.insert_one({
+            "channel": channel,
+            "event": event,
+            "created_at": datetime.now(timezone.utc)
+        })
+
+    async def start(self):
+        self.task = asyncio.create_task(self.watch())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    async def watch(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with db.message_events.watch(pipeline, resume_after=self.resume_token) as stream:
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        doc = change["fullDocument"]
+                        self.deliver(doc["channel"], doc["event"])
+            except PyMongoError as e:
+                logging.error(f"Message bus change stream error: {e}")
+                await asyncio.sleep(1)
+
+MESSAGE_BUS_BACKENDS = {
+    "memory": InProcessMessageBus,
+    "mongo": MongoChangeStreamBus,
+}
+message_bus = MESSAGE_BUS_BACKENDS[MESSAGE_BUS]()
+
+def request_channel(request_id: str) -> str:
+    return f"request:{request_id}"
+
+# ============ PAGINATION ============
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque cursor for keyset pagination"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def keyset_filter(fields: List[str], values: List[Any], op: str) -> Dict:
+    """Match documents strictly past (values) in (fields) order, e.g. for
+    fields [a, b] and op $lt: a < va OR (a == va AND b < vb)"""
+    clauses = []
+    for i, field in enumerate(fields):
+        clause = {f: v for f, v in zip(fields[:i], values[:i])}
+        clause[field] = {op: values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
 
 # ============ AUTH ROUTES ============
 
@@ -204,7 +985,7 @@ async def register(user_data: UserCreate):
         "user_id": user_id,
         "email": user_data.email,
         "name": user_data.name,
-        "password": hash_password(user_data.password),
+        "password": await run_password_job(hash_password, user_data.password),
         "preferred_language": user_data.preferred_language,
         "role": "client",
         "picture": None,
@@ -234,7 +1015,7 @@ async def login(credentials: UserLogin, response: Response):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(credentials.password, user["password"]):
+    if not await run_password_job(verify_password, credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_token(user["user_id"], user["email"], user["role"])
@@ -287,18 +1068,16 @@ async def handle_oauth_session(request: Request, response: Response):
         raise HTTPException(status_code=400, detail="Session ID required")
     
     # Get user data from Emergent Auth
-    async with httpx.AsyncClient() as client:
-        try:
-            auth_response = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id}
-            )
-            if auth_response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid session")
-            
-            oauth_data = auth_response.json()
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+    try:
+        auth_response = await get_http_client().get(
+            EMERGENT_AUTH_SESSION_URL,
+            headers={"X-Session-ID": session_id}
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+    if auth_response.status_code != 200:
+        raise HTTPException(status_code=401, detail="Invalid session")
+    oauth_data = auth_response.json()
     
     # Check if user exists
     existing_user = await db.users.find_one({"email": oauth_data["email"]}, {"_id": 0})
@@ -310,6 +1089,7 @@ async def handle_oauth_session(request: Request, response: Response):
             {"user_id": user_id},
             {"$set": {"name": oauth_data["name"], "picture": oauth_data.get("picture")}}
         )
+        invalidate_user(user_id)
         role = existing_user["role"]
     else:
         # Create new user
@@ -363,10 +1143,20 @@ async def handle_oauth_session(request: Request, response: Response):
 
 # ============ CATEGORIES ROUTES ============
 
-@api_router.get("/categories")
-async def get_categories(language: str = "es"):
-    categories = await db.categories.find({"is_active": True}, {"_id": 0}).to_list(100)
-    
+# Active categories, localized once per language and served from memory
+category_catalog = {
+    "version": None,
+    "built_at": 0.0,
+    "categories": [],
+    "localized": {},
+    "trees": {},
+    # category_id -> ids from the root down to its parent / every id below it
+    "ancestors": {},
+    "descendants": {}
+}
+category_catalog_lock = asyncio.Lock()
+
+def localize_categories(categories: List[Dict], language: str) -> List[Dict]:
     # Format for frontend
     result = []
     for cat in categories:
@@ -377,14 +1167,106 @@ async def get_categories(language: str = "es"):
             "description": cat["description"].get(language, cat["description"].get("es", "")),
             "parent_id": cat.get("parent_id")
         })
-    
     return result
 
+def category_ancestry(categories: List[Dict]) -> Dict[str, List[str]]:
+    """Materialize each category's ancestor path from parent_id links.
+    A category whose parent is missing or inactive, or that sits on a
+    parent_id cycle, is treated as a root."""
+    parents = {cat["category_id"]: cat.get("parent_id") for cat in categories}
+    ancestry = {}
+    for category_id in parents:
+        path = []
+        parent = parents[category_id]
+        while parent in parents and parent not in path and parent != category_id:
+            path.append(parent)
+            parent = parents[parent]
+        if parent in path or parent == category_id:
+            path = []
+        ancestry[category_id] = path[::-1]
+    return ancestry
+
+def build_category_tree(localized: List[Dict], ancestry: Dict[str, List[str]]) -> List[Dict]:
+    nodes = {cat["category_id"]: {**cat, "ancestors": ancestry[cat["category_id"]], "children": []} for cat in localized}
+    roots = []
+    for node in nodes.values():
+        if node["ancestors"]:
+            nodes[node["ancestors"][-1]]["children"].append(node)
+        else:
+            roots.append(node)
+    return roots
+
+async def rebuild_category_catalog():
+    categories = await db.categories.find({"is_active": True}, {"_id": 0}).sort("category_id", 1).to_list(None)
+    languages = {"es"} | {lang for cat in categories for lang in (*cat["name"], *cat["description"])}
+    localized = {lang: localize_categories(categories, lang) for lang in languages}
+    ancestry = category_ancestry(categories)
+    descendants = {category_id: [] for category_id in ancestry}
+    for category_id, ancestors in ancestry.items():
+        for ancestor in ancestors:
+            descendants[ancestor].append(category_id)
+    category_catalog.update({
+        "version": hashlib.sha1(json.dumps(categories, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16],
+        "built_at": time.monotonic(),
+        "categories": categories,
+        "localized": localized,
+        "trees": {lang: build_category_tree(localized[lang], ancestry) for lang in languages},
+        "ancestors": ancestry,
+        "descendants": descendants
+    })
+
+async def get_category_catalog() -> Dict:
+    if time.monotonic() - category_catalog["built_at"] > CATEGORY_CATALOG_TTL_SECONDS:
+        async with category_catalog_lock:
+            # Another request may have rebuilt it while we waited for the lock
+            if time.monotonic() - category_catalog["built_at"] > CATEGORY_CATALOG_TTL_SECONDS:
+                await rebuild_category_catalog()
+    return category_catalog
+
+def invalidate_category_catalog():
+    category_catalog["built_at"] = 0.0
+
+async def category_filter(category_id: str):
+    """Match providers in category_id or any category below it, as one $in on the categories index"""
+    catalog = await get_category_catalog()
+    descendants = catalog["descendants"].get(category_id)
+    if not descendants:
+        return category_id
+    return {"$in": [category_id, *descendants]}
+
+@api_router.get("/categories")
+async def get_categories(request: Request, language: str = "es"):
+    catalog = await get_category_catalog()
+    etag = f'"{catalog["version"]}-{language}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CATEGORY_CATALOG_TTL_SECONDS}"}
+    
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    # A language no category is written in localizes exactly like the Spanish fallback
+    localized = catalog["localized"].get(language, catalog["localized"]["es"])
+    return JSONResponse(localized, headers=headers)
+
+@api_router.get("/categories/tree")
+async def get_category_tree(request: Request, language: str = "es"):
+    catalog = await get_category_catalog()
+    etag = f'"{catalog["version"]}-tree-{language}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CATEGORY_CATALOG_TTL_SECONDS}"}
+    
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    return JSONResponse(catalog["trees"].get(language, catalog["trees"]["es"]), headers=headers)
+
 @api_router.post("/categories")
 async def create_category(category_data: dict, user = Depends(require_auth)):
     if user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     
+    parent_id = category_data.get("parent_id")
+    if parent_id and not await db.categories.find_one({"category_id": parent_id}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="Parent category not found")
+    
     category_id = f"cat_{uuid.uuid4().hex[:8]}"
     category_doc = {
         "category_id": category_id,
@@ -396,41 +1278,243 @@ async def create_category(category_data: dict, user = Depends(require_auth)):
     }
     
     await db.categories.insert_one(category_doc)
+    invalidate_category_catalog()
     return {"category_id": category_id, "message": "Category created"}
 
 # ============ PROVIDERS ROUTES ============
 
+async def enrich_providers(providers: List[Dict]) -> List[Dict]:
+    """Attach user name/email/picture to providers with a single batched users query"""
+    user_ids = list({prov["user_id"] for prov in providers})
+    if not user_ids:
+        return []
+
+    users = await db.users.find(
+        {"user_id": {"$in": user_ids}},
+        {"_id": 0, "user_id": 1, "name": 1, "email": 1, "picture": 1}
+    ).to_list(None)
+    users_by_id = {u["user_id"]: u for u in users}
+
+    # Providers without a matching user are dropped, as before
+    result = []
+    for prov in providers:
+        user = users_by_id.get(prov["user_id"])
+        if user:
+            result.append({
+                **prov,
+                "name": user["name"],
+                "email": user["email"],
+                "picture": user.get("picture")
+            })
+
+    return result
+
+def to_geo_point(location: Optional[Dict]) -> Optional[Dict]:
+    """Normalize {lat, lng} or a GeoJSON Point into a GeoJSON Point for the 2dsphere index"""
+    if not location:
+        return None
+    try:
+        if location.get("type") == "Point":
+            lng, lat = (float(c) for c in location["coordinates"])
+        else:
+            lat, lng = float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="location must be {lat, lng} or a GeoJSON Point")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise HTTPException(status_code=400, detail="location out of range")
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+async def normalize_provider_locations():
+    """Convert provider locations stored as {lat, lng} to GeoJSON so the 2dsphere index can build"""
+    updates = []
+    async for prov in db.providers.find({"location.lat": {"$exists": True}}, {"_id": 0, "provider_id": 1, "location": 1}):
+        try:
+            point = to_geo_point(prov["location"])
+        except HTTPException:
+            point = None
+        updates.append(UpdateOne({"provider_id": prov["provider_id"]}, {"$set": {"location": point}}))
+    if updates:
+        await db.providers.bulk_write(updates, ordered=False)
+        logging.info(f"Converted {len(updates)} provider locations to GeoJSON")
+
+# Weights of the ranking blend; each component is scaled to 0..1
+RANK_WEIGHTS = {
+    "distance": 0.35,
+    "rating": 0.25,
+    "reviews": 0.10,
+    "verified": 0.10,
+    "availability": 0.10,
+    "response_time": 0.10,
+}
+AVAILABILITY_SCORES = {"available": 1.0, "busy": 0.3, "offline": 0.0}
+
+def parse_response_time_hours(response_time: Optional[str]) -> float:
+    """'30m', '2h', '24h', '2d' -> hours; unparseable values count as a day"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([mhd]?)\s*", str(response_time or ""))
+    if not match:
+        return 24.0
+    value, unit = float(match.group(1)), match.group(2) or "h"
+    return value * {"m": 1 / 60, "h": 1, "d": 24}[unit]
+
+def compute_rank_score(provider: Dict) -> float:
+    """Distance-independent part of the ranking, stored on the provider as rank_score"""
+    reviews = provider.get("total_reviews") or 0
+    # Shrink the average towards 3.5 stars until a provider has a few reviews
+    rating = ((provider.get("rating") or 0) * reviews + 3.5 * 5) / (reviews + 5)
+    score = (
+        RANK_WEIGHTS["rating"] * rating / 5
+        + RANK_WEIGHTS["reviews"] * min(1.0, math.log1p(reviews) / math.log1p(500))
+        + RANK_WEIGHTS["verified"] * (1.0 if provider.get("verified") else 0.0)
+        + RANK_WEIGHTS["availability"] * AVAILABILITY_SCORES.get(provider.get("availability"), 0.0)
+        + RANK_WEIGHTS["response_time"] / (1 + parse_response_time_hours(provider.get("response_time")) / 4)
+    )
+    return round(score, 6)
+
+async def backfill_rank_scores(query: Optional[Dict] = None):
+    """Store rank_score on providers matching query; by default those that predate ranking"""
+    if query is None:
+        query = {"rank_score": {"$exists": False}}
+    updates = []
+    slot_updates = []
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    async for prov in db.providers.find(query, {"_id": 0}):
+        prov["rank_score"] = compute_rank_score(prov)
+        updates.append(UpdateOne({"provider_id": prov["provider_id"]}, {"$set": {"rank_score": prov["rank_score"]}}))
+        slot_updates.append(UpdateMany(
+            {"provider_id": prov["provider_id"], "day": {"$gte": today}},
+            {"$set": availability_provider_fields(prov)}
+        ))
+        if len(updates) >= 1000:
+            await db.providers.bulk_write(updates, ordered=False)
+            await db.availability_slots.bulk_write(slot_updates, ordered=False)
+            updates = []
+            slot_updates = []
+    if updates:
+        await db.providers.bulk_write(updates, ordered=False)
+        await db.availability_slots.bulk_write(slot_updates, ordered=False)
+
+async def search_providers_near(query: Dict, lat: float, lng: float, radius_km: float, limit: int = 100, skip: int = 0) -> List[Dict]:
+    """Best-ranked providers within radius_km matching query, with distance_km and score.
+
+    $geoNear hands the nearest PROVIDER_RANK_CANDIDATES to a scoring stage that
+    adds the distance component to the stored rank_score; sort, skip and limit
+    all run in MongoDB."""
+    return await db.providers.aggregate([
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [lng, lat]},
+            "key": "location",
+            "distanceField": "distance_km",
+            "distanceMultiplier": 0.001,
+            "maxDistance": radius_km * 1000,
+            "spherical": True,
+            "query": query
+        }},
+        {"$limit": PROVIDER_RANK_CANDIDATES},
+        {"$addFields": {"score": {"$add": [
+            {"$ifNull": ["$rank_score", 0]},
+            {"$multiply": [RANK_WEIGHTS["distance"], {"$subtract": [1, {"$divide": ["$distance_km", radius_km]}]}]}
+        ]}}},
+        {"$sort": {"score": -1, "provider_id": 1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": {"_id": 0}}
+    ]).to_list(limit)
+
 @api_router.get("/providers")
 async def get_providers(
     category_id: Optional[str] = None,
     postal_code: Optional[str] = None,
     lat: Optional[float] = None,
     lng: Optional[float] = None,
+    radius_km: float = PROVIDER_SEARCH_RADIUS_KM,
+    page: int = 1,
+    page_size: int = 100,
     language: str = "es"
 ):
     query = {"availability": {"$ne": "offline"}}
     
     if category_id:
-        query["categories"] = category_id
+        query["categories"] = await category_filter(category_id)
     
     if postal_code:
         query["postal_code"] = postal_code
     
-    providers = await db.providers.find(query, {"_id": 0}).to_list(100)
+    # Ranked top-K: pages are served from the database, never past PROVIDER_MAX_RESULTS
+    page_size = max(1, min(page_size, 100))
+    skip = (max(page, 1) - 1) * page_size
+    if skip >= PROVIDER_MAX_RESULTS:
+        return []
+    limit = min(page_size, PROVIDER_MAX_RESULTS - skip)
     
-    # Enrich with user data
-    result = []
-    for prov in providers:
-        user = await db.users.find_one({"user_id": prov["user_id"]}, {"_id": 0, "password": 0})
-        if user:
-            result.append({
-                **prov,
-                "name": user["name"],
-                "email": user["email"],
-                "picture": user.get("picture")
-            })
+    if lat is not None and lng is not None:
+        to_geo_point({"lat": lat, "lng": lng})  # validates the range
+        providers = await search_providers_near(query, lat, lng, min(max(radius_km, 0.1), 500), limit, skip)
+    else:
+        providers = await db.providers.find(query, {"_id": 0}).sort(
+            [("rank_score", DESCENDING), ("provider_id", ASCENDING)]
+        ).skip(skip).limit(limit).to_list(limit)
+
+    return await enrich_providers(providers)
+
+# Declared before /providers/{provider_id} so "available" isn't taken for an id
+@api_router.get("/providers/available")
+async def get_available_providers(
+    category_id: str,
+    start: str,
+    end: str,
+    limit: int = 50
+):
+    """Providers in category_id (or below it) with a free slot covering [start, end]"""
+    window_start, window_end = parse_datetime(start), parse_datetime(end)
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    day_start = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window_end > day_start + timedelta(days=1):
+        raise HTTPException(status_code=400, detail="Window must fall within a single (UTC) day")
+    
+    limit = max(1, min(limit, PROVIDER_MAX_RESULTS))
+    provider_ids = await find_free_provider_ids(
+        await category_filter(category_id),
+        day_start.strftime("%Y-%m-%d"),
+        int((window_start - day_start).total_seconds() // 60),
+        math.ceil((window_end - day_start).total_seconds() / 60),
+        limit
+    )
+    providers = await db.providers.find({"provider_id": {"$in": provider_ids}}, {"_id": 0}).to_list(limit)
+    # Keep the ranking the slot query already applied
+    position = {provider_id: i for i, provider_id in enumerate(provider_ids)}
+    providers.sort(key=lambda prov: position[prov["provider_id"]])
+    return await enrich_providers(providers)
+
+# Declared before /providers/{provider_id} so "earnings" isn't taken for an id
+@api_router.get("/providers/earnings")
+async def get_provider_earnings(
+    user = Depends(require_auth),
+    period: str = "month",
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    provider = await db.providers.find_one({"user_id": user["user_id"]}, {"_id": 0, "provider_id": 1})
+    if not provider:
+        raise HTTPException(status_code=404, detail="Provider profile not found")
     
-    return result
+    rollups = await find_earnings_rollups(
+        "provider", provider_earnings_keys(user["user_id"], provider), period, start, end
+    )
+    # Transactions may name the provider by user_id or provider_id; fold both into one series
+    series: Dict[str, Dict] = {}
+    for rollup in rollups:
+        point = series.setdefault(rollup["period_start"], {"period_start": rollup["period_start"], "total": 0, "payments": 0})
+        point["total"] += rollup["total"]
+        point["payments"] += rollup["payments"]
+    
+    return {
+        "period": period,
+        "currency": "EUR",
+        "total": sum(point["total"] for point in series.values()),
+        "payments": sum(point["payments"] for point in series.values()),
+        "series": sorted(series.values(), key=lambda point: point["period_start"])
+    }
 
 @api_router.get("/providers/{provider_id}")
 async def get_provider(provider_id: str, language: str = "es"):
@@ -466,10 +1550,13 @@ async def register_as_provider(provider_data: dict, user = Depends(require_auth)
         "rating": 0.0,
         "total_reviews": 0,
         "verified": False,
-        "location": provider_data.get("location"),
+        "location": to_geo_point(provider_data.get("location")),
         "postal_code": provider_data.get("postal_code"),
+        # Stemming language for the text_search index
+        "text_language": text_search_language(user.get("preferred_language")),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
+    provider_doc["rank_score"] = compute_rank_score(provider_doc)
     
     await db.providers.insert_one(provider_doc)
     
@@ -478,6 +1565,7 @@ async def register_as_provider(provider_data: dict, user = Depends(require_auth)
         {"user_id": user["user_id"]},
         {"$set": {"role": "provider"}}
     )
+    invalidate_user(user["user_id"])
     
     return {"provider_id": provider_id, "message": "Registered as provider"}
 
@@ -489,11 +1577,17 @@ async def update_provider_profile(update_data: dict, user = Depends(require_auth
     
     allowed_fields = ["bio", "categories", "services", "availability", "response_time", "location", "postal_code"]
     update_dict = {k: v for k, v in update_data.items() if k in allowed_fields}
+    if "location" in update_dict:
+        update_dict["location"] = to_geo_point(update_dict["location"])
+    update_dict["rank_score"] = compute_rank_score({**provider, **update_dict})
     
     await db.providers.update_one(
         {"user_id": user["user_id"]},
         {"$set": update_dict}
     )
+    await sync_availability_provider({**provider, **update_dict})
+    if "categories" in update_dict:
+        await sync_availability_categories(provider["provider_id"], update_dict["categories"])
     
     return {"message": "Profile updated"}
 
@@ -516,6 +1610,8 @@ async def create_request(request_data: dict, user = Depends(require_auth)):
         "price_agreed": request_data.get("price_agreed"),
         "location": request_data.get("location"),
         "postal_code": request_data.get("postal_code"),
+        # Stemming language for the text_search index
+        "text_language": text_search_language(user.get("preferred_language")),
         "created_at": now,
         "updated_at": now
     }
@@ -524,17 +1620,72 @@ async def create_request(request_data: dict, user = Depends(require_auth)):
     
     return {"request_id": request_id, "message": "Request created"}
 
+# Fields the dashboard lists need; description is cut to a preview
+REQUEST_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "request_id": 1,
+    "client_id": 1,
+    "provider_id": 1,
+    "category_id": 1,
+    "title": 1,
+    "description": {"$substrCP": ["$description", 0, 140]},
+    "urgency": 1,
+    "status": 1,
+    "price_agreed": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
 @api_router.get("/requests")
-async def get_requests(user = Depends(require_auth)):
-    # Get requests where user is client or provider
+async def get_requests(
+    user = Depends(require_auth),
+    status: Optional[str] = None,
+    view: str = "full",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    include_counts: bool = False
+):
+    limit = max(1, min(limit, 100))
+    result = await list_user_requests(user["user_id"], status, view, cursor, limit)
+    if include_counts:
+        result["status_counts"] = await request_status_counts(user["user_id"])
+    return result
+
+async def list_user_requests(user_id: str, status: Optional[str], view: str, cursor: Optional[str], limit: int) -> Dict:
+    # Get requests where user is client or provider. Every condition is repeated
+    # inside both $or branches so each branch runs on its own index and the two
+    # (created_at, request_id)-ordered streams are merged without an in-memory sort.
+    conditions = {}
+    if status:
+        conditions["status"] = status
+    if cursor:
+        created_at, request_id = decode_cursor(cursor, 2)
+        conditions["created_at"] = {"$lte": created_at}
+        conditions["$nor"] = [{"created_at": created_at, "request_id": {"$gte": request_id}}]
     query = {"$or": [
-        {"client_id": user["user_id"]},
-        {"provider_id": user["user_id"]}
+        {"client_id": user_id, **conditions},
+        {"provider_id": user_id, **conditions}
     ]}
     
-    requests = await db.requests.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
+    projection = REQUEST_SUMMARY_PROJECTION if view == "summary" else {"_id": 0}
+    requests = await db.requests.find(query, projection).sort(
+        [("created_at", DESCENDING), ("request_id", DESCENDING)]
+    ).limit(limit + 1).to_list(limit + 1)
     
-    return requests
+    has_more = len(requests) > limit
+    requests = requests[:limit]
+    return {
+        "requests": requests,
+        "has_more": has_more,
+        "next_cursor": encode_cursor([requests[-1]["created_at"], requests[-1]["request_id"]]) if has_more else None
+    }
+
+async def request_status_counts(user_id: str) -> Dict[str, int]:
+    counts = await db.requests.aggregate([
+        {"$match": {"$or": [{"client_id": user_id}, {"provider_id": user_id}]}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    return {c["_id"]: c["count"] for c in counts}
 
 @api_router.get("/requests/{request_id}")
 async def get_request(request_id: str, user = Depends(require_auth)):
@@ -569,18 +1720,354 @@ async def update_request(request_id: str, update_data: dict, user = Depends(requ
     
     return {"message": "Request updated"}
 
+# ============ AVAILABILITY CALENDAR ============
+
+# One document per provider and day (UTC). `free` holds the merged [start, end)
+# minute ranges; `slots` repeats them once per provider category, because
+# MongoDB can't index the categories array and a slots array together.
+# rank_score and offline are copied from the provider so the lookup can rank,
+# filter and limit without a second pass over the providers:
+#   {"provider_id", "day": "2024-05-01", "date": <day start>, "rank_score", "offline",
+#    "free": [[540, 780]], "slots": [{"category_id", "start": 540, "end": 780}]}
+
+def parse_day(day: str) -> datetime:
+    try:
+        return datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid day: {day}")
+
+def parse_datetime(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid datetime: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def parse_minutes(value: str) -> int:
+    """'HH:MM' to minutes since midnight; '24:00' closes the day"""
+    try:
+        hours, minutes = (int(part) for part in value.split(":"))
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value}")
+    if not (0 <= minutes < 60 and 0 <= hours * 60 + minutes <= 1440):
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value}")
+    return hours * 60 + minutes
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def merge_intervals(intervals: List[List[int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def availability_slots(free: List[List[int]], categories: List[str]) -> List[Dict]:
+    return [{"category_id": category, "start": start, "end": end} for category in categories for start, end in free]
+
+def availability_provider_fields(provider: Dict) -> Dict:
+    """Provider fields copied onto its slot documents"""
+    return {"rank_score": provider.get("rank_score", 0), "offline": provider.get("availability") == "offline"}
+
+async def find_free_provider_ids(category_condition: Any, day: str, start: int, end: int, limit: int) -> List[str]:
+    """Best-ranked online providers free for the window; the sort is a top-`limit`
+    sort over the index matches, so only `limit` ids ever leave the database"""
+    docs = await db.availability_slots.find(
+        {"day": day, "offline": {"$ne": True}, "slots": {"$elemMatch": {
+            "category_id": category_condition,
+            "start": {"$lte": start},
+            "end": {"$gte": end}
+        }}},
+        {"_id": 0, "provider_id": 1}
+    ).sort([("rank_score", DESCENDING), ("provider_id", ASCENDING)]).limit(limit).to_list(limit)
+    return [doc["provider_id"] for doc in docs]
+
+async def sync_availability_provider(provider: Dict):
+    """Copy a provider's current rank_score and online status onto its upcoming days"""
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    await db.availability_slots.update_many(
+        {"provider_id": provider["provider_id"], "day": {"$gte": today}},
+        {"$set": availability_provider_fields(provider)}
+    )
+
+async def sync_availability_categories(provider_id: str, categories: List[str]):
+    """Rebuild slots from free time after the provider's categories change"""
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    await db.availability_slots.update_many(
+        {"provider_id": provider_id, "day": {"$gte": today}},
+        [{"$set": {"slots": {"$reduce": {
+            "input": {"$literal": categories},
+            "initialValue": [],
+            "in": {"$concatArrays": ["$$value", {"$map": {
+                "input": "$free",
+                "as": "range",
+                "in": {
+                    "category_id": "$$this",
+                    "start": {"$arrayElemAt": ["$$range", 0]},
+                    "end": {"$arrayElemAt": ["$$range", 1]}
+                }
+            }}]}
+        }}}}]
+    )
+
+@api_router.put("/providers/availability")
+async def set_provider_availability(availability_data: dict, user = Depends(require_auth)):
+    """Replace the free time of each given day, e.g.
+    {"days": {"2024-05-01": [["09:00", "13:00"], ["15:00", "19:00"]], "2024-05-02": []}}"""
+    provider = await db.providers.find_one(
+        {"user_id": user["user_id"]},
+        {"_id": 0, "provider_id": 1, "categories": 1, "rank_score": 1, "availability": 1}
+    )
+    if not provider:
+        raise HTTPException(status_code=404, detail="Provider profile not found")
+    
+    days = availability_data.get("days")
+    if not isinstance(days, dict) or not days:
+        raise HTTPException(status_code=400, detail="days is required")
+    
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    updates = []
+    for day, ranges in days.items():
+        date = parse_day(day)
+        if not today <= date <= today + timedelta(days=AVAILABILITY_HORIZON_DAYS):
+            raise HTTPException(status_code=400, detail=f"{day} is outside the next {AVAILABILITY_HORIZON_DAYS} days")
+        
+        free = []
+        for time_range in ranges or []:
+            if not isinstance(time_range, (list, tuple)) or len(time_range) != 2:
+                raise HTTPException(status_code=400, detail="Each time range must be [start, end]")
+            start, end = parse_minutes(time_range[0]), parse_minutes(time_range[1])
+            if end <= start:
+                raise HTTPException(status_code=400, detail="end must be after start")
+            free.append([start, end])
+        
+        key = {"provider_id": provider["provider_id"], "day": day}
+        if not free:
+            updates.append(DeleteOne(key))
+            continue
+        free = merge_intervals(free)
+        updates.append(UpdateOne(key, {"$set": {
+            "date": date,
+            "free": free,
+            "slots": availability_slots(free, provider.get("categories", [])),
+            **availability_provider_fields(provider),
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }}, upsert=True))
+    
+    await db.availability_slots.bulk_write(updates, ordered=False)
+    return {"message": "Availability updated", "days": len(updates)}
+
+@api_router.get("/providers/{provider_id}/availability")
+async def get_provider_availability(provider_id: str, start: Optional[str] = None, end: Optional[str] = None):
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start_day = (parse_day(start) if start else today).strftime("%Y-%m-%d")
+    end_day = (parse_day(end) if end else today + timedelta(days=13)).strftime("%Y-%m-%d")
+    
+    docs = await db.availability_slots.find(
+        {"provider_id": provider_id, "day": {"$gte": start_day, "$lte": end_day}},
+        {"_id": 0, "day": 1, "free": 1}
+    ).sort("day", ASCENDING).to_list(None)
+    return {
+        "provider_id": provider_id,
+        "days": {doc["day"]: [[format_minutes(s), format_minutes(e)] for s, e in doc["free"]] for doc in docs}
+    }
+
+# ============ REVIEWS ROUTES ============
+
+@api_router.post("/reviews")
+async def create_review(review_data: dict, user = Depends(require_auth)):
+    # No coercion: 4.7 or true are rejected rather than stored as 4 or 1
+    rating = review_data.get("rating")
+    if not isinstance(rating, int) or isinstance(rating, bool) or not 1 <= rating <= 5:
+        raise HTTPException(status_code=400, detail="rating must be an integer from 1 to 5")
+    
+    request = await db.requests.find_one({"request_id": review_data.get("request_id")}, {"_id": 0})
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if request["client_id"] != user["user_id"]:
+        raise HTTPException(status_code=403, detail="Only the client can review this request")
+    if request["status"] != "completed" or not request.get("provider_id"):
+        raise HTTPException(status_code=400, detail="Only completed requests with a provider can be reviewed")
+    
+    # requests.provider_id may hold either the provider_id or the provider's user_id
+    provider = await db.providers.find_one(
+        {"$or": [{"provider_id": request["provider_id"]}, {"user_id": request["provider_id"]}]},
+        {"_id": 0, "provider_id": 1}
+    )
+    if not provider:
+        raise HTTPException(status_code=404, detail="Provider not found")
+    
+    review_doc = {
+        "review_id": f"rev_{uuid.uuid4().hex[:8]}",
+        "request_id": request["request_id"],
+        "provider_id": provider["provider_id"],
+        "client_id": user["user_id"],
+        "rating": rating,
+        "comment": (review_data.get("comment") or "").strip() or None,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    try:
+        await db.reviews.insert_one(review_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Request already reviewed")
+    
+    # Fold the new rating into the running aggregate atomically, without re-reading every review.
+    # rating_sum is seeded from rating * total_reviews for providers rated before it existed.
+    updated = await db.providers.find_one_and_update(
+        {"provider_id": provider["provider_id"]},
+        [
+            {"$set": {
+                "rating_sum": {"$add": [
+                    {"$ifNull": ["$rating_sum", {"$multiply": [{"$ifNull": ["$rating", 0]}, {"$ifNull": ["$total_reviews", 0]}]}]},
+                    rating
+                ]},
+                "total_reviews": {"$add": [{"$ifNull": ["$total_reviews", 0]}, 1]}
+            }},
+            {"$set": {"rating": {"$round": [{"$divide": ["$rating_sum", "$total_reviews"]}, 2]}}}
+        ],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    # Skip the rank_score write if a newer review already landed; that one will write it
+    rank_score = compute_rank_score(updated)
+    result = await db.providers.update_one(
+        {"provider_id": updated["provider_id"], "total_reviews": updated["total_reviews"]},
+        {"$set": {"rank_score": rank_score}}
+    )
+    if result.modified_count:
+        await sync_availability_provider({**updated, "rank_score": rank_score})
+    
+    return {
+        "review_id": review_doc["review_id"],
+        "rating": updated["rating"],
+        "total_reviews": updated["total_reviews"]
+    }
+
+@api_router.get("/providers/{provider_id}/reviews")
+async def get_provider_reviews(provider_id: str, cursor: Optional[str] = None, limit: int = 20):
+    limit = max(1, min(limit, 100))
+    query = {"provider_id": provider_id}
+    if cursor:
+        query.update(keyset_filter(["created_at", "review_id"], decode_cursor(cursor, 2), "$lt"))
+    
+    reviews = await db.reviews.find(query, {"_id": 0}).sort(
+        [("created_at", DESCENDING), ("review_id", DESCENDING)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    has_more = len(reviews) > limit
+    reviews = reviews[:limit]
+    return {
+        "reviews": reviews,
+        "has_more": has_more,
+        "next_cursor": encode_cursor([reviews[-1]["created_at"], reviews[-1]["review_id"]]) if has_more else None
+    }
+
+async def backfill_provider_ratings() -> int:
+    """Recompute every provider's rating aggregates from the reviews collection in bulk"""
+    stamp = datetime.now(timezone.utc).isoformat()
+    await db.reviews.aggregate([
+        {"$group": {"_id": "$provider_id", "rating_sum": {"$sum": "$rating"}, "total_reviews": {"$sum": 1}}},
+        {"$project": {
+            "_id": 0,
+            "provider_id": "$_id",
+            "rating_sum": 1,
+            "total_reviews": 1,
+            "rating": {"$round": [{"$divide": ["$rating_sum", "$total_reviews"]}, 2]},
+            "ratings_backfilled_at": stamp
+        }},
+        {"$merge": {"into": "providers", "on": "provider_id", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ]).to_list(None)
+    
+    # Providers the merge did not touch have no reviews left
+    await db.providers.update_many(
+        {"ratings_backfilled_at": {"$ne": stamp}, "total_reviews": {"$gt": 0}},
+        {"$set": {"rating": 0.0, "rating_sum": 0, "total_reviews": 0}}
+    )
+    
+    await backfill_rank_scores({})
+    rated = await db.providers.count_documents({"ratings_backfilled_at": stamp})
+    logging.info(f"Backfilled ratings for {rated} providers")
+    return rated
+
+@api_router.post("/admin/reviews/backfill")
+async def run_review_backfill(user = Depends(require_auth)):
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    
+    rated = await backfill_provider_ratings()
+    return {"message": "Ratings recomputed", "rated_providers": rated}
+
+# ============ SEARCH ROUTES ============
+
+@api_router.get("/search")
+async def search(
+    q: str,
+    user = Depends(get_current_user),
+    scope: str = "all",
+    language: str = "es",
+    page: int = 1,
+    page_size: int = 20
+):
+    """Relevance-ranked full-text search over provider bios/services and,
+    for signed-in users, the titles and descriptions of their own requests"""
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Query required")
+    if scope not in ("all", "providers", "requests"):
+        raise HTTPException(status_code=400, detail="scope must be all, providers or requests")
+    
+    page_size = max(1, min(page_size, 50))
+    skip = (max(page, 1) - 1) * page_size
+    text_query = {"$search": q, "$language": text_search_language(language)}
+    projection = {"_id": 0, "score": {"$meta": "textScore"}}
+    sort = [("score", {"$meta": "textScore"})]
+    
+    async def search_providers():
+        if scope == "requests":
+            return []
+        providers = await db.providers.find(
+            {"$text": text_query, "availability": {"$ne": "offline"}}, projection
+        ).sort(sort).skip(skip).limit(page_size).to_list(page_size)
+        return await enrich_providers(providers)
+    
+    async def search_requests():
+        if scope == "providers" or not user:
+            return []
+        return await db.requests.find(
+            {"$text": text_query, "$or": [{"client_id": user["user_id"]}, {"provider_id": user["user_id"]}]},
+            projection
+        ).sort(sort).skip(skip).limit(page_size).to_list(page_size)
+    
+    providers, requests = await asyncio.gather(search_providers(), search_requests())
+    
+    return {"query": q, "page": max(page, 1), "page_size": page_size, "providers": providers, "requests": requests}
+
 # ============ MESSAGES ROUTES ============
 
 @api_router.post("/messages")
 async def send_message(message_data: dict, user = Depends(require_auth)):
+    # Same access check as get_messages, and the receiver must be the other party
+    request = await db.requests.find_one(
+        {"request_id": message_data.get("request_id")}, {"_id": 0, "client_id": 1, "provider_id": 1}
+    )
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    
+    participants = {request["client_id"], request.get("provider_id")}
+    if user["user_id"] not in participants:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if message_data.get("receiver_id") not in participants - {user["user_id"], None}:
+        raise HTTPException(status_code=400, detail="receiver_id must be the other party on the request")
+    
     message_id = f"msg_{uuid.uuid4().hex[:8]}"
     
-    # Translate message if needed
-    translated = {}
-    receiver = await db.users.find_one({"user_id": message_data["receiver_id"]}, {"_id": 0})
-    if receiver and receiver.get("preferred_language"):
-        target_lang = receiver["preferred_language"]
-        translated[target_lang] = await translate_text(message_data["content"], target_lang)
+    # Translation happens in the background; see TRANSLATION WORKERS
+    languages = await message_languages(user, message_data["receiver_id"])
     
     message_doc = {
         "message_id": message_id,
@@ -588,17 +2075,152 @@ async def send_message(message_data: dict, user = Depends(require_auth)):
         "sender_id": user["user_id"],
         "receiver_id": message_data["receiver_id"],
         "content": message_data["content"],
-        "translated_content": translated,
+        "translated_content": {},
+        "translation_status": "pending" if languages else "done",
         "read": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.messages.insert_one(message_doc)
+    await update_conversations(message_doc)
+    
+    await message_bus.publish(
+        request_channel(message_data["request_id"]),
+        {"type": "message", "message": {k: v for k, v in message_doc.items() if k != "_id"}}
+    )
+    
+    if languages:
+        # On a full queue the message stays pending and translation_sweeper picks it up
+        enqueue_message_translation(message_id, message_data["request_id"], message_data["content"], languages)
+    
+    return {"message_id": message_id, "translation_status": message_doc["translation_status"]}
+
+def last_message_summary(message: Dict) -> Dict:
+    return {
+        "message_id": message["message_id"],
+        "sender_id": message["sender_id"],
+        "content": message["content"],
+        "created_at": message["created_at"]
+    }
+
+async def update_conversations(message: Dict):
+    """Bump the receiver's unread count and move the message into both
+    participants' conversation summaries (one document per user and request)"""
+    last_message = last_message_summary(message)
+    updates = []
+    for user_id, counterpart_id, unread in (
+        (message["receiver_id"], message["sender_id"], 1),
+        (message["sender_id"], message["receiver_id"], 0)
+    ):
+        key = {"user_id": user_id, "request_id": message["request_id"]}
+        updates.append(UpdateOne(
+            key,
+            {"$inc": {"unread_count": unread}, "$setOnInsert": {"counterpart_id": counterpart_id}},
+            upsert=True
+        ))
+        # Only move the preview forward, so a slower concurrent send can't replace a newer one
+        updates.append(UpdateOne(
+            {**key, "updated_at": {"$not": {"$gte": message["created_at"]}}},
+            {"$set": {"last_message": last_message, "updated_at": message["created_at"]}}
+        ))
+    await db.conversations.bulk_write(updates)
+
+async def backfill_conversations():
+    """Build conversation summaries from existing messages; only needed the first time they are deployed"""
+    if await db.conversations.estimated_document_count():
+        return
+    await db.messages.aggregate([
+        {"$sort": {"created_at": ASCENDING, "message_id": ASCENDING}},
+        {"$project": {
+            "request_id": 1,
+            "last_message": {"message_id": "$message_id", "sender_id": "$sender_id", "content": "$content", "created_at": "$created_at"},
+            "participants": [
+                {"user_id": "$sender_id", "counterpart_id": "$receiver_id", "unread": {"$literal": 0}},
+                {"user_id": "$receiver_id", "counterpart_id": "$sender_id", "unread": {"$cond": ["$read", 0, 1]}}
+            ]
+        }},
+        {"$unwind": "$participants"},
+        {"$group": {
+            "_id": {"user_id": "$participants.user_id", "request_id": "$request_id"},
+            "counterpart_id": {"$last": "$participants.counterpart_id"},
+            "unread_count": {"$sum": "$participants.unread"},
+            "last_message": {"$last": "$last_message"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "request_id": "$_id.request_id",
+            "counterpart_id": 1,
+            "unread_count": 1,
+            "last_message": 1,
+            "updated_at": "$last_message.created_at"
+        }},
+        {"$merge": {"into": "conversations", "on": ["user_id", "request_id"], "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ], allowDiskUse=True).to_list(None)
+
+@api_router.get("/messages/unread")
+async def get_unread_counts(user = Depends(require_auth)):
+    return await unread_summary(user["user_id"])
+
+async def unread_summary(user_id: str) -> Dict:
+    conversations = await db.conversations.find(
+        {"user_id": user_id, "unread_count": {"$gt": 0}},
+        {"_id": 0, "request_id": 1, "unread_count": 1}
+    ).to_list(None)
+    by_request = {c["request_id"]: c["unread_count"] for c in conversations}
+    return {"total": sum(by_request.values()), "by_request": by_request}
+
+@api_router.get("/conversations")
+async def get_conversations(user = Depends(require_auth), cursor: Optional[str] = None, limit: int = 20):
+    """Inbox: the user's conversations, most recently active first"""
+    limit = max(1, min(limit, 100))
+    query = {"user_id": user["user_id"]}
+    if cursor:
+        query.update(keyset_filter(["updated_at", "request_id"], decode_cursor(cursor, 2), "$lt"))
+    
+    conversations = await db.conversations.find(query, {"_id": 0, "user_id": 0}).sort(
+        [("updated_at", DESCENDING), ("request_id", DESCENDING)]
+    ).limit(limit + 1).to_list(limit + 1)
+    has_more = len(conversations) > limit
+    conversations = conversations[:limit]
+    
+    # Request titles and counterpart names are looked up for the page in two batched queries
+    requests, users = await asyncio.gather(
+        db.requests.find(
+            {"request_id": {"$in": [c["request_id"] for c in conversations]}},
+            {"_id": 0, "request_id": 1, "title": 1, "status": 1}
+        ).to_list(None),
+        db.users.find(
+            {"user_id": {"$in": list({c["counterpart_id"] for c in conversations})}},
+            {"_id": 0, "user_id": 1, "name": 1, "picture": 1}
+        ).to_list(None)
+    )
+    requests_by_id = {r["request_id"]: r for r in requests}
+    users_by_id = {u["user_id"]: u for u in users}
+    for conv in conversations:
+        request = requests_by_id.get(conv["request_id"], {})
+        counterpart = users_by_id.get(conv["counterpart_id"], {})
+        conv["unread_count"] = max(conv.get("unread_count", 0), 0)
+        conv["title"] = request.get("title")
+        conv["status"] = request.get("status")
+        conv["counterpart_name"] = counterpart.get("name")
+        conv["counterpart_picture"] = counterpart.get("picture")
     
-    return {"message_id": message_id}
+    return {
+        "conversations": conversations,
+        "has_more": has_more,
+        "next_cursor": encode_cursor([conversations[-1]["updated_at"], conversations[-1]["request_id"]]) if has_more else None
+    }
 
 @api_router.get("/messages/{request_id}")
-async def get_messages(request_id: str, user = Depends(require_auth), language: str = "es"):
+async def get_messages(
+    request_id: str,
+    user = Depends(require_auth),
+    language: str = "es",
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 50
+):
     # Verify access to request
     request = await db.requests.find_one({"request_id": request_id})
     if not request:
@@ -607,15 +2229,137 @@ async def get_messages(request_id: str, user = Depends(require_auth), language:
     if request["client_id"] != user["user_id"] and request.get("provider_id") != user["user_id"]:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    messages = await db.messages.find({"request_id": request_id}, {"_id": 0}).sort("created_at", 1).to_list(1000)
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+    limit = max(1, min(limit, 200))
+    
+    # Keyset pagination on (created_at, message_id); without a cursor, the latest page
+    keys = ["created_at", "message_id"]
+    query = {"request_id": request_id}
+    if after:
+        query.update(keyset_filter(keys, decode_cursor(after, 2), "$gt"))
+        direction = ASCENDING
+    else:
+        if before:
+            query.update(keyset_filter(keys, decode_cursor(before, 2), "$lt"))
+        direction = DESCENDING
+    
+    messages = await db.messages.find(query, {"_id": 0}).sort(
+        [("created_at", direction), ("message_id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if direction == DESCENDING:
+        messages.reverse()
     
-    # Mark as read
-    await db.messages.update_many(
-        {"request_id": request_id, "receiver_id": user["user_id"], "read": False},
+    await fill_missing_translations(messages, language, user["user_id"])
+    
+    await mark_messages_read(request_id, user["user_id"])
+    
+    return {
+        "messages": messages,
+        "has_more": has_more,
+        # Pass as `before` to scroll back, or as `after` to fetch newer messages
+        "before_cursor": encode_cursor([messages[0]["created_at"], messages[0]["message_id"]]) if messages else before,
+        "after_cursor": encode_cursor([messages[-1]["created_at"], messages[-1]["message_id"]]) if messages else after
+    }
+
+async def mark_messages_read(request_id: str, reader_id: str):
+    result = await db.messages.update_many(
+        {"request_id": request_id, "receiver_id": reader_id, "read": False},
         {"$set": {"read": True}}
     )
-    
-    return messages
+    if result.modified_count:
+        # Subtract what was actually marked read rather than zeroing, so a message
+        # sent concurrently with this read still counts as unread
+        await db.conversations.update_one(
+            {"user_id": reader_id, "request_id": request_id},
+            {"$inc": {"unread_count": -result.modified_count}}
+        )
+        await message_bus.publish(request_channel(request_id), {
+            "type": "read",
+            "request_id": request_id,
+            "reader_id": reader_id,
+            "read_at": datetime.now(timezone.utc).isoformat()
+        })
+
+@api_router.websocket("/ws/messages/{request_id}")
+async def messages_socket(websocket: WebSocket, request_id: str):
+    """Pushes new messages, translations and read receipts for one thread.
+
+    Browsers can't set headers on a WebSocket, so the JWT comes from the
+    session_token cookie or a `token` query parameter."""
+    token = websocket.cookies.get("session_token") or websocket.query_params.get("token")
+    payload = decode_token(token) if token else None
+    user = await load_user(payload["user_id"]) if payload else None
+    if not user:
+        await websocket.close(code=4401)
+        return
+
+    request = await db.requests.find_one({"request_id": request_id}, {"_id": 0, "client_id": 1, "provider_id": 1})
+    if not request or (request["client_id"] != user["user_id"] and request.get("provider_id") != user["user_id"]):
+        await websocket.close(code=4403)
+        return
+
+    await websocket.accept()
+    channel = request_channel(request_id)
+    queue = message_bus.subscribe(channel)
+
+    async def forward_events():
+        while True:
+            await websocket.send_json(await queue.get())
+
+    forwarder = asyncio.create_task(forward_events())
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if isinstance(data, dict) and data.get("type") == "read":
+                await mark_messages_read(request_id, user["user_id"])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        forwarder.cancel()
+        message_bus.unsubscribe(channel, queue)
+
+async def fill_missing_translations(messages: List[Dict], language: str, viewer_id: str):
+    """Translate, in place, messages from others that lack `language`.
+
+    Messages still pending are skipped: the translation worker is already on
+    them and pushes the result over the socket. Misses go through translate_text's
+    batching, so a page costs one LLM call. Translations still running after
+    LAZY_TRANSLATION_TIMEOUT_SECONDS are left to finish in the background; they
+    land in the translation cache and get stored on the next read."""
+    missing = [
+        msg for msg in messages
+        if msg["sender_id"] != viewer_id
+        and msg.get("translation_status") != "pending"
+        and language not in (msg.get("translated_content") or {})
+    ]
+    if not missing:
+        return
+
+    tasks = {asyncio.ensure_future(lookup_or_translate(msg["content"], language)): msg for msg in missing}
+    for task in tasks:
+        translation_tasks.add(task)
+        task.add_done_callback(translation_tasks.discard)
+    done, _ = await asyncio.wait(tasks, timeout=LAZY_TRANSLATION_TIMEOUT_SECONDS)
+
+    updates = []
+    for task in done:
+        translated = task.result() if not task.exception() else None
+        if translated is None:
+            continue
+        msg = tasks[task]
+        msg["translated_content"] = {**(msg.get("translated_content") or {}), language: translated}
+        updates.append(UpdateOne(
+            {"message_id": msg["message_id"]},
+            {"$set": {f"translated_content.{language}": translated}}
+        ))
+    if updates:
+        await db.messages.bulk_write(updates, ordered=False)
 
 # ============ TRANSLATION ROUTE ============
 
@@ -630,20 +2374,31 @@ async def translate(data: dict, user = Depends(get_current_user)):
     translated = await translate_text(text, target)
     return {"translated": translated, "original": text, "target_language": target}
 
+@api_router.post("/translate/batch")
+async def translate_batch(data: dict, user = Depends(require_auth)):
+    texts = data.get("texts", [])
+    target = data.get("target_language", "en")
+    
+    if not isinstance(texts, list) or len(texts) > 100 or not all(isinstance(t, str) for t in texts):
+        raise HTTPException(status_code=400, detail="texts must be a list of at most 100 strings")
+    
+    async def translate_segment(text: str) -> str:
+        return await translate_text(text, target) if text else ""
+    
+    # Cache hits return at once; misses are coalesced and batched by translate_text
+    translations = await asyncio.gather(*(translate_segment(text) for text in texts))
+    return {"translations": list(translations), "target_language": target}
+
 # ============ PAYMENT ROUTES (Stripe) ============
 
 @api_router.post("/payments/stripe/checkout")
 async def create_stripe_checkout(payment_data: dict, request: Request, user = Depends(require_auth)):
-    from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionRequest
-    
-    api_key = os.environ.get('STRIPE_API_KEY')
-    if not api_key:
-        raise HTTPException(status_code=500, detail="Stripe not configured")
+    from emergentintegrations.payments.stripe.checkout import CheckoutSessionRequest
     
     host_url = str(request.base_url).rstrip('/')
     webhook_url = f"{host_url}/api/webhook/stripe"
     
-    stripe_checkout = StripeCheckout(api_key=api_key, webhook_url=webhook_url)
+    stripe_checkout = get_stripe_checkout(webhook_url)
     
     # Get request details
     service_request = await db.requests.find_one({"request_id": payment_data["request_id"]})
@@ -685,60 +2440,393 @@ async def create_stripe_checkout(payment_data: dict, request: Request, user = De
     
     return {"url": session.url, "session_id": session.session_id}
 
+# Checkout sessions whose outcome can no longer change, answered from our own record
+TERMINAL_PAYMENT_STATUSES = {
+    "completed": {"status": "complete", "payment_status": "paid"},
+    "expired": {"status": "expired", "payment_status": "unpaid"},
+}
+
+payment_status_cache = TTLCache(maxsize=10000, ttl=PAYMENT_STATUS_CACHE_SECONDS)  # session_id -> pending status
+payment_status_inflight: Dict[str, asyncio.Task] = {}
+payment_status_stats = {"local": 0, "cache_hits": 0, "coalesced": 0, "upstream": 0}
+
 @api_router.get("/payments/stripe/status/{session_id}")
 async def get_stripe_status(session_id: str, user = Depends(require_auth)):
-    from emergentintegrations.payments.stripe.checkout import StripeCheckout
-    
-    api_key = os.environ.get('STRIPE_API_KEY')
-    stripe_checkout = StripeCheckout(api_key=api_key, webhook_url="")
-    
-    status = await stripe_checkout.get_checkout_status(session_id)
-    
-    # Update transaction status
-    if status.payment_status == "paid":
-        await db.payment_transactions.update_one(
-            {"session_id": session_id},
-            {"$set": {"status": "completed"}}
-        )
-        
-        # Update request status
-        transaction = await db.payment_transactions.find_one({"session_id": session_id})
-        if transaction:
-            await db.requests.update_one(
-                {"request_id": transaction["request_id"]},
-                {"$set": {"status": "completed", "updated_at": datetime.now(timezone.utc).isoformat()}}
-            )
+    transaction = await db.payment_transactions.find_one(
+        {"session_id": session_id}, {"_id": 0, "status": 1, "amount": 1, "currency": 1}
+    )
+    if transaction and transaction.get("status") in TERMINAL_PAYMENT_STATUSES:
+        payment_status_stats["local"] += 1
+        return {
+            **TERMINAL_PAYMENT_STATUSES[transaction["status"]],
+            # Stripe reports amounts in minor units
+            "amount_total": round(transaction["amount"] * 100),
+            "currency": transaction.get("currency", "EUR").lower()
+        }
     
-    return {
+    cached = payment_status_cache.get(session_id)
+    if cached is not None:
+        payment_status_stats["cache_hits"] += 1
+        return cached
+    
+    # Concurrent polls for the same session share one upstream lookup
+    task = payment_status_inflight.get(session_id)
+    if task is None:
+        task = asyncio.create_task(lookup_checkout_status(session_id))
+        payment_status_inflight[session_id] = task
+        task.add_done_callback(lambda _: payment_status_inflight.pop(session_id, None))
+    else:
+        payment_status_stats["coalesced"] += 1
+    return await asyncio.shield(task)
+
+async def lookup_checkout_status(session_id: str) -> Dict:
+    payment_status_stats["upstream"] += 1
+    status = await get_stripe_checkout().get_checkout_status(session_id)
+    result = {
         "status": status.status,
         "payment_status": status.payment_status,
         "amount_total": status.amount_total,
         "currency": status.currency
     }
+    
+    if status.payment_status == "paid":
+        await apply_payment_status(session_id, status.payment_status)
+    elif status.status == "expired":
+        await db.payment_transactions.update_one(
+            {"session_id": session_id, "status": "pending"},
+            {"$set": {"status": "expired"}}
+        )
+    else:
+        # Only pending results are cached; terminal ones are answered locally from now on
+        payment_status_cache[session_id] = result
+    return result
 
 @api_router.post("/webhook/stripe")
 async def stripe_webhook(request: Request):
-    from emergentintegrations.payments.stripe.checkout import StripeCheckout
-    
-    api_key = os.environ.get('STRIPE_API_KEY')
-    stripe_checkout = StripeCheckout(api_key=api_key, webhook_url="")
+    stripe_checkout = get_stripe_checkout()
     
     body = await request.body()
     signature = request.headers.get("Stripe-Signature")
     
     try:
         webhook_response = await stripe_checkout.handle_webhook(body, signature)
-        
-        if webhook_response.payment_status == "paid":
-            await db.payment_transactions.update_one(
-                {"session_id": webhook_response.session_id},
-                {"$set": {"status": "completed"}}
-            )
-        
-        return {"status": "processed"}
     except Exception as e:
         logging.error(f"Stripe webhook error: {e}")
-        return {"status": "error"}
+        raise HTTPException(status_code=400, detail="Invalid webhook")
+    
+    # Record the event and ack straight away; Stripe retries anything that isn't
+    # a quick 2xx, and a retried (or replayed) event hits the unique event_key
+    event_id = getattr(webhook_response, "event_id", None)
+    event = {
+        "event_key": event_id or f"{webhook_response.session_id}:{webhook_response.payment_status}",
+        "event_id": event_id,
+        "event_type": getattr(webhook_response, "event_type", None),
+        "session_id": webhook_response.session_id,
+        "payment_status": webhook_response.payment_status,
+        "status": "received",
+        "attempts": 0,
+        "received_at": datetime.now(timezone.utc)
+    }
+    try:
+        await db.stripe_events.insert_one(event)
+    except DuplicateKeyError:
+        payment_event_stats["duplicates"] += 1
+        return {"status": "duplicate"}
+    
+    payment_event_stats["received"] += 1
+    enqueue_payment_event(event["event_key"])
+    return {"status": "accepted"}
+
+# ============ PAYMENT EVENT WORKERS ============
+
+payment_event_queue: asyncio.Queue = asyncio.Queue(maxsize=PAYMENT_EVENT_QUEUE_SIZE)
+payment_event_tasks: List[asyncio.Task] = []
+payment_event_stats = {"received": 0, "duplicates": 0, "processed": 0, "retries": 0, "failed": 0, "dropped": 0}
+
+def enqueue_payment_event(event_key: str):
+    try:
+        payment_event_queue.put_nowait(event_key)
+    except asyncio.QueueFull:
+        # Still logged as received, so the sweeper will pick it up
+        payment_event_stats["dropped"] += 1
+
+async def complete_payment(session_id: str, session=None) -> bool:
+    """Mark the transaction and its request completed and add it to the earnings
+    rollups. The writes are conditional, so running this again for the same
+    session changes nothing."""
+    transaction = await db.payment_transactions.find_one(
+        {"session_id": session_id},
+        {"_id": 0, "request_id": 1, "provider_id": 1, "amount": 1, "currency": 1},
+        session=session
+    )
+    if not transaction:
+        return False
+    
+    now = datetime.now(timezone.utc).isoformat()
+    result = await db.payment_transactions.update_one(
+        {"session_id": session_id, "status": {"$ne": "completed"}},
+        {"$set": {"status": "completed", "completed_at": now}},
+        session=session
+    )
+    await db.requests.update_one(
+        {"request_id": transaction["request_id"], "status": {"$ne": "completed"}},
+        {"$set": {"status": "completed", "updated_at": now}},
+        session=session
+    )
+    if not result.modified_count:
+        return False
+    
+    # Only the call that flipped the status counts the earnings, in the same transaction
+    request = await db.requests.find_one(
+        {"request_id": transaction["request_id"]}, {"_id": 0, "category_id": 1}, session=session
+    )
+    await record_earnings(transaction, (request or {}).get("category_id"), now, session)
+    return True
+
+async def apply_payment_status(session_id: str, payment_status: str) -> bool:
+    """Apply a Stripe payment status; True if this call completed the payment"""
+    if payment_status != "paid":
+        return False
+    
+    async with await client.start_session() as session:
+        try:
+            return await session.with_transaction(lambda s: complete_payment(session_id, s))
+        except OperationFailure as e:
+            # IllegalOperation: a standalone mongod has no transactions. The writes
+            # are idempotent, so a retry after a partial failure still converges.
+            if e.code != 20:
+                raise
+    return await complete_payment(session_id)
+
+async def process_payment_event(event_key: str):
+    event = await db.stripe_events.find_one({"event_key": event_key, "status": "received"})
+    if not event:
+        # Already processed by another worker or an earlier delivery
+        return
+    
+    try:
+        await apply_payment_status(event["session_id"], event["payment_status"])
+    except PyMongoError as e:
+        attempts = event["attempts"] + 1
+        failed = attempts >= PAYMENT_EVENT_MAX_ATTEMPTS
+        payment_event_stats["failed" if failed else "retries"] += 1
+        await db.stripe_events.update_one(
+            {"event_key": event_key},
+            {"$set": {"attempts": attempts, "error": str(e), **({"status": "failed"} if failed else {})}}
+        )
+        logging.error(f"Payment event {event_key} failed (attempt {attempts}): {e}")
+        return
+    
+    await db.stripe_events.update_one(
+        {"event_key": event_key},
+        {"$set": {"status": "processed", "processed_at": datetime.now(timezone.utc)}, "$inc": {"attempts": 1}}
+    )
+    payment_event_stats["processed"] += 1
+
+async def payment_event_worker():
+    while True:
+        event_key = await payment_event_queue.get()
+        try:
+            await process_payment_event(event_key)
+        except Exception as e:
+            logging.error(f"Payment event worker error for {event_key}: {e}")
+        finally:
+            payment_event_queue.task_done()
+
+async def payment_event_sweeper():
+    """Re-queue events left unprocessed by a crash, a full queue or an error"""
+    while True:
+        try:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=PAYMENT_EVENT_RETRY_SECONDS)
+            async for event in db.stripe_events.find(
+                {"status": "received", "received_at": {"$lt": cutoff}}, {"_id": 0, "event_key": 1}
+            ):
+                enqueue_payment_event(event["event_key"])
+        except PyMongoError as e:
+            logging.error(f"Payment event sweep error: {e}")
+        await asyncio.sleep(PAYMENT_EVENT_RETRY_SECONDS)
+
+# ============ EARNINGS ROLLUPS ============
+
+# One document per (dimension, key, period, period_start), e.g. provider prov_x for
+# month 2024-05, so reports read a handful of rollups instead of every transaction
+EARNINGS_DIMENSIONS = ("provider", "category")
+EARNINGS_PERIODS = {"day": 10, "month": 7}  # period -> length of its ISO timestamp prefix
+# A rebuild holding its lease longer than this is presumed dead and can be taken over
+EARNINGS_REBUILD_LEASE_SECONDS = 600
+
+async def record_earnings(transaction: Dict, category_id: Optional[str], completed_at: str, session=None):
+    updates = []
+    for dimension, key in (("provider", transaction.get("provider_id")), ("category", category_id)):
+        if not key:
+            continue
+        for period, length in EARNINGS_PERIODS.items():
+            updates.append(UpdateOne(
+                {"dimension": dimension, "key": key, "period": period, "period_start": completed_at[:length]},
+                {
+                    "$inc": {"total": transaction["amount"], "payments": 1},
+                    "$set": {"currency": transaction.get("currency", "EUR"), "updated_at": completed_at}
+                },
+                upsert=True
+            ))
+    if updates:
+        await db.earnings_rollups.bulk_write(updates, session=session)
+
+def provider_earnings_keys(user_id: str, provider: Optional[Dict]) -> List[str]:
+    return [user_id] + ([provider["provider_id"]] if provider else [])
+
+async def find_earnings_rollups(
+    dimension: str,
+    keys: Optional[List[str]],
+    period: str,
+    start: Optional[str],
+    end: Optional[str],
+    limit: int = 0
+) -> List[Dict]:
+    if dimension not in EARNINGS_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of: {', '.join(EARNINGS_DIMENSIONS)}")
+    if period not in EARNINGS_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of: {', '.join(EARNINGS_PERIODS)}")
+    
+    query: Dict[str, Any] = {"dimension": dimension, "period": period}
+    if keys is not None:
+        query["key"] = {"$in": keys}
+    if start or end:
+        query["period_start"] = {}
+        if start:
+            query["period_start"]["$gte"] = start[:EARNINGS_PERIODS[period]]
+        if end:
+            query["period_start"]["$lte"] = end[:EARNINGS_PERIODS[period]]
+    
+    return await db.earnings_rollups.find(
+        query, {"_id": 0, "key": 1, "period_start": 1, "total": 1, "payments": 1, "currency": 1}
+    ).sort([("period_start", DESCENDING), ("total", DESCENDING)]).limit(limit).to_list(None)
+
+async def acquire_lease(name: str, seconds: int) -> Optional[str]:
+    """Take the named lease in the `leases` collection, shared by every worker.
+    Returns an owner token, or None while someone else holds it; a lease whose
+    holder died lapses after `seconds`."""
+    owner = uuid.uuid4().hex
+    now = datetime.now(timezone.utc)
+    try:
+        # Matches only a lapsed lease; a live one makes the upsert collide on _id
+        await db.leases.update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return None
+    return owner
+
+async def release_lease(name: str, owner: str):
+    await db.leases.delete_one({"_id": name, "owner": owner})
+
+async def backfill_earnings_rollups() -> Optional[int]:
+    """Rebuild every rollup from completed transactions with one aggregation.
+    Returns None without doing anything if another worker is already rebuilding."""
+    owner = await acquire_lease("earnings_rollups_rebuild", EARNINGS_REBUILD_LEASE_SECONDS)
+    if not owner:
+        return None
+    try:
+        return await rebuild_earnings_rollups()
+    finally:
+        await release_lease("earnings_rollups_rebuild", owner)
+
+async def rebuild_earnings_rollups() -> int:
+    stamp = datetime.now(timezone.utc).isoformat()
+    await db.payment_transactions.aggregate([
+        {"$match": {"status": "completed"}},
+        {"$lookup": {"from": "requests", "localField": "request_id", "foreignField": "request_id", "as": "request"}},
+        {"$project": {
+            "amount": 1,
+            "currency": {"$ifNull": ["$currency", "EUR"]},
+            # Completed before completed_at was recorded: fall back to creation time
+            "completed_at": {"$ifNull": ["$completed_at", "$created_at"]},
+            "keys": [
+                {"dimension": "provider", "key": "$provider_id"},
+                {"dimension": "category", "key": {"$arrayElemAt": ["$request.category_id", 0]}}
+            ]
+        }},
+        {"$unwind": "$keys"},
+        {"$match": {"keys.key": {"$nin": [None, ""]}}},
+        {"$project": {
+            "amount": 1,
+            "currency": 1,
+            "keys": 1,
+            "periods": [
+                {"period": period, "period_start": {"$substrCP": ["$completed_at", 0, length]}}
+                for period, length in EARNINGS_PERIODS.items()
+            ]
+        }},
+        {"$unwind": "$periods"},
+        {"$group": {
+            "_id": {
+                "dimension": "$keys.dimension",
+                "key": "$keys.key",
+                "period": "$periods.period",
+                "period_start": "$periods.period_start"
+            },
+            "total": {"$sum": "$amount"},
+            "payments": {"$sum": 1},
+            "currency": {"$first": "$currency"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "dimension": "$_id.dimension",
+            "key": "$_id.key",
+            "period": "$_id.period",
+            "period_start": "$_id.period_start",
+            "total": 1,
+            "payments": 1,
+            "currency": 1,
+            "updated_at": stamp,
+            "rebuilt_at": stamp
+        }},
+        {"$merge": {
+            "into": "earnings_rollups",
+            "on": ["dimension", "key", "period", "period_start"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ], allowDiskUse=True).to_list(None)
+    
+    # Rollups from an earlier rebuild that this one did not produce have no
+    # transactions left. Rollups first created by a payment completing during the
+    # rebuild have no rebuilt_at and are kept. The replace above does overwrite an
+    # increment record_earnings made to an existing rollup after the aggregation
+    # read that payment, so payments completing mid-rebuild can be undercounted;
+    # run the rebuild again once they have settled.
+    await db.earnings_rollups.delete_many({"rebuilt_at": {"$lt": stamp}, "updated_at": {"$lt": stamp}})
+    
+    rebuilt = await db.earnings_rollups.count_documents({"rebuilt_at": stamp})
+    logging.info(f"Rebuilt {rebuilt} earnings rollups")
+    return rebuilt
+
+@api_router.get("/admin/earnings")
+async def get_admin_earnings(
+    user = Depends(require_auth),
+    dimension: str = "provider",
+    period: str = "month",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = 100
+):
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    
+    rollups = await find_earnings_rollups(dimension, None, period, start, end, max(1, min(limit, 1000)))
+    return {"dimension": dimension, "period": period, "rollups": rollups}
+
+@api_router.post("/admin/earnings/backfill")
+async def run_earnings_backfill(user = Depends(require_auth)):
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    
+    rebuilt = await backfill_earnings_rollups()
+    if rebuilt is None:
+        raise HTTPException(status_code=409, detail="Earnings rollups are already being rebuilt")
+    return {"message": "Earnings rollups rebuilt", "rollups": rebuilt}
 
 # ============ USER PROFILE ROUTES ============
 
@@ -751,6 +2839,7 @@ async def update_user_profile(update_data: dict, user = Depends(require_auth)):
         {"user_id": user["user_id"]},
         {"$set": update_dict}
     )
+    invalidate_user(user["user_id"])
     
     return {"message": "Profile updated"}
 
@@ -759,6 +2848,43 @@ async def get_user_provider_profile(user = Depends(require_auth)):
     provider = await db.providers.find_one({"user_id": user["user_id"]}, {"_id": 0})
     return provider
 
+# ============ DASHBOARD ROUTE ============
+
+async def earnings_summary(user_id: str) -> Dict:
+    provider = await db.providers.find_one({"user_id": user_id}, {"_id": 0, "provider_id": 1})
+    rollups = await find_earnings_rollups("provider", provider_earnings_keys(user_id, provider), "month", None, None)
+    return {
+        "total": sum(rollup["total"] for rollup in rollups),
+        "payments": sum(rollup["payments"] for rollup in rollups),
+        "currency": "EUR"
+    }
+
+@api_router.get("/dashboard")
+async def get_dashboard(user = Depends(require_auth), limit: int = 50):
+    """Everything a dashboard needs for first paint in one round-trip; the user
+    is resolved once and the independent queries run concurrently"""
+    limit = max(1, min(limit, 100))
+    is_provider = user["role"] == "provider"
+    
+    async def no_result():
+        return None
+    
+    requests, status_counts, unread, profile, earnings = await asyncio.gather(
+        list_user_requests(user["user_id"], None, "summary", None, limit),
+        request_status_counts(user["user_id"]),
+        unread_summary(user["user_id"]),
+        db.providers.find_one({"user_id": user["user_id"]}, {"_id": 0}) if is_provider else no_result(),
+        earnings_summary(user["user_id"]) if is_provider else no_result()
+    )
+    
+    return {
+        **requests,
+        "status_counts": status_counts,
+        "unread": unread,
+        "provider_profile": profile,
+        "earnings": earnings
+    }
+
 # ============ SEED DATA ============
 
 @api_router.post("/seed/categories")
@@ -877,9 +3003,67 @@ async def seed_categories():
     
     # Insert new
     await db.categories.insert_many(categories)
+    invalidate_category_catalog()
     
     return {"message": f"Seeded {len(categories)} categories"}
 
+# ============ METRICS ROUTE ============
+
+def cache_hit_ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+@api_router.get("/metrics")
+async def get_metrics(user = Depends(require_auth)):
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    return {
+        "password_pool": {
+            **password_pool_stats,
+            "workers": PASSWORD_HASH_WORKERS,
+            "max_queue": PASSWORD_HASH_MAX_QUEUE
+        },
+        "auth_cache": {
+            **auth_cache_stats,
+            "tokens_cached": len(token_cache),
+            "users_cached": len(user_cache)
+        },
+        "translation_cache": {
+            **translation_cache_stats,
+            "hit_ratio": cache_hit_ratio(
+                translation_cache_stats["memory_hits"] + translation_cache_stats["db_hits"],
+                translation_cache_stats["misses"]
+            ),
+            "entries_in_memory": len(translation_cache)
+        },
+        "translation_batching": {
+            **translation_batch_stats,
+            "inflight": len(translation_inflight)
+        },
+        "message_bus": {
+            "backend": MESSAGE_BUS,
+            "channels": len(message_bus.subscribers),
+            "subscribers": sum(len(queues) for queues in message_bus.subscribers.values()),
+            "dropped": message_bus.dropped
+        },
+        "translation_workers": {
+            **translation_worker_stats,
+            "queue_depth": translation_queue.qsize(),
+            "workers": TRANSLATION_WORKERS
+        },
+        "payment_status": {
+            **payment_status_stats,
+            "cached": len(payment_status_cache),
+            "inflight": len(payment_status_inflight)
+        },
+        "payment_events": {
+            **payment_event_stats,
+            "queue_depth": payment_event_queue.qsize(),
+            "workers": PAYMENT_EVENT_WORKERS
+        }
+    }
+
 # ============ ROOT ROUTE ============
 
 @api_router.get("/")
@@ -904,6 +3088,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_indexes():
+    await normalize_provider_locations()
+    await backfill_rank_scores()
+    await ensure_indexes()
+    await backfill_conversations()
+    if not await db.earnings_rollups.estimated_document_count():
+        # First deploy of the rollups: build them from past payments. Every worker
+        # gets here; the lease lets one of them do it and the rest skip.
+        await backfill_earnings_rollups()
+    await rebuild_category_catalog()
+
+@app.on_event("startup")
+async def start_message_bus():
+    await message_bus.start()
+
+@app.on_event("startup")
+async def start_translation_workers():
+    for _ in range(TRANSLATION_WORKERS):
+        translation_worker_tasks.append(asyncio.create_task(translation_worker()))
+    translation_worker_tasks.append(asyncio.create_task(translation_sweeper()))
+
+@app.on_event("startup")
+async def start_payment_event_workers():
+    for _ in range(PAYMENT_EVENT_WORKERS):
+        payment_event_tasks.append(asyncio.create_task(payment_event_worker()))
+    payment_event_tasks.append(asyncio.create_task(payment_event_sweeper()))
+
+@app.on_event("startup")
+async def open_http_client():
+    get_http_client()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await message_bus.stop()
+    if http_client is not None:
+        await http_client.aclose()
+    for task in translation_worker_tasks + payment_event_tasks:
+        task.cancel()
     client.close()
+    password_executor.shutdown(wait=False)
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""Backend performance benchmarks.
+
+Runs against a real MongoDB (MONGO_URL, default mongodb://localhost:27017)
+using a scratch database that is dropped at the end of each benchmark.
+
+    python backend_benchmark.py providers
+    python backend_benchmark.py login-storm
+    python backend_benchmark.py geo
+    python backend_benchmark.py http-clients
+    python backend_benchmark.py availability
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+import statistics
+import subprocess
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from pymongo import monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "helpmynew_bench")
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import server  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+BENCH_DB = f"helpmynew_bench_{uuid.uuid4().hex[:6]}"
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to MongoDB (one per round-trip)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def connect():
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], event_listeners=[counter])
+    db = client[BENCH_DB]
+    # Route the server's handlers through the instrumented scratch database
+    server.db = db
+    return client, db, counter
+
+
+async def measure(counter, coro_factory, repeat=5):
+    """Return (round-trips per call, best wall time in ms)"""
+    best = float("inf")
+    trips = 0
+    for _ in range(repeat):
+        before = counter.count
+        start = time.perf_counter()
+        await coro_factory()
+        best = min(best, (time.perf_counter() - start) * 1000)
+        trips = counter.count - before
+    return trips, best
+
+
+def print_row(label, trips, ms):
+    print(f"   {label:<28} {trips:>6} round-trips {ms:>10.2f} ms")
+
+
+# ============ PROVIDERS (N+1 enrichment) ============
+
+async def seed_providers(db, n):
+    users = []
+    providers = []
+    for i in range(n):
+        user_id = f"user_bench{i:06d}"
+        users.append({
+            "user_id": user_id,
+            "email": f"bench{i}@example.com",
+            "name": f"Bench User {i}",
+            "password": "x",
+            "role": "provider",
+            "picture": None,
+        })
+        providers.append({
+            "provider_id": f"prov_bench{i:06d}",
+            "user_id": user_id,
+            "categories": ["cat_cleaning"],
+            "availability": "available",
+        })
+    await db.users.insert_many(users)
+    await db.users.create_index("user_id", unique=True)
+    await db.providers.insert_many(providers)
+
+
+async def legacy_enrich(db, providers):
+    result = []
+    for prov in providers:
+        user = await db.users.find_one({"user_id": prov["user_id"]}, {"_id": 0, "password": 0})
+        if user:
+            result.append({**prov, "name": user["name"], "email": user["email"], "picture": user.get("picture")})
+    return result
+
+
+async def bench_providers(sizes):
+    client, db, counter = connect()
+    print("📊 Provider enrichment (GET /api/providers)")
+    try:
+        for n in sizes:
+            await db.client.drop_database(BENCH_DB)
+            await seed_providers(db, n)
+
+            async def fetch():
+                return await db.providers.find({}, {"_id": 0}).to_list(None)
+
+            async def legacy():
+                await legacy_enrich(db, await fetch())
+
+            async def batched():
+                await server.enrich_providers(await fetch())
+
+            print(f"\n   n = {n}")
+            print_row("before (find_one per row)", *await measure(counter, legacy))
+            print_row("after ($in batch)", *await measure(counter, batched))
+    finally:
+        await db.client.drop_database(BENCH_DB)
+        client.close()
+
+
+# ============ LOGIN STORM (bcrypt off the event loop) ============
+
+async def probe_latencies(app, stop, interval=0.01):
+    """Hit GET /api/ every interval until stop is set; return latencies in ms.
+
+    Latency is measured from when the probe was due, so time spent waiting
+    for a blocked event loop counts against it."""
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        while not stop.is_set():
+            due = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            await http.get("/api/")
+            latencies.append((time.perf_counter() - due) * 1000)
+    return latencies
+
+
+async def storm(logins, hashed, offload):
+    async def login():
+        if offload:
+            await server.run_password_job(server.verify_password, "BenchPass123!", hashed)
+        else:
+            server.verify_password("BenchPass123!", hashed)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_latencies(server.app, stop))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return await probe, elapsed
+
+
+def print_latencies(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"   {label:<28} storm {elapsed:>6.2f} s  probes {len(latencies):>4}  "
+          f"p50 {statistics.median(latencies):>8.2f} ms  p99 {p99:>8.2f} ms  max {latencies[-1]:>8.2f} ms")
+
+
+async def bench_login_storm(logins):
+    hashed = server.hash_password("BenchPass123!")
+    print(f"📊 GET /api/ latency during {logins} concurrent logins "
+          f"(pool: {server.PASSWORD_HASH_WORKERS} workers)")
+    print_latencies("before (inline bcrypt)", *await storm(logins, hashed, offload=False))
+    print_latencies("after (password pool)", *await storm(logins, hashed, offload=True))
+    print(f"   pool stats: {server.password_pool_stats}")
+
+
+# ============ GEO SEARCH ($geoNear over synthetic providers) ============
+
+CATEGORIES = [
+    "cat_cooking", "cat_gardening", "cat_hairdressing", "cat_psychology", "cat_sewing",
+    "cat_painting", "cat_cleaning", "cat_moving", "cat_childcare", "cat_eldercare",
+    "cat_accessibility", "cat_reading", "cat_repairs", "cat_technology", "cat_pets",
+]
+# Synthetic providers are scattered around this point (Madrid), +/- SPREAD degrees
+CENTER = (40.4168, -3.7038)
+SPREAD = 1.5
+
+
+def random_point(rng):
+    return CENTER[0] + rng.uniform(-SPREAD, SPREAD), CENTER[1] + rng.uniform(-SPREAD, SPREAD)
+
+
+def synthetic_provider(rng, i):
+    lat, lng = random_point(rng)
+    provider = {
+        "provider_id": f"prov_geo{i:07d}",
+        "user_id": f"user_geo{i:07d}",
+        "bio": "",
+        "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+        "services": [],
+        "availability": rng.choice(["available", "available", "busy", "offline"]),
+        "response_time": rng.choice(["1h", "2h", "24h"]),
+        "rating": round(rng.uniform(3, 5), 1),
+        "total_reviews": rng.randint(0, 200),
+        "verified": rng.random() < 0.3,
+        "location": {"type": "Point", "coordinates": [lng, lat]},
+        "postal_code": None,
+    }
+    provider["rank_score"] = server.compute_rank_score(provider)
+    return provider
+
+
+async def seed_synthetic_providers(db, n, chunk=10000):
+    rng = random.Random(42)
+    for start in range(0, n, chunk):
+        await db.providers.insert_many([synthetic_provider(rng, i) for i in range(start, min(n, start + chunk))])
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return tuple(samples[min(len(samples) - 1, int(len(samples) * q))] for q in (0.5, 0.95, 0.99))
+
+
+async def bench_geo(n, queries, radius_km):
+    client, db, _ = connect()
+    print(f"📊 Ranked geo provider search over {n} synthetic providers ({queries} queries, {radius_km} km radius)")
+    try:
+        start = time.perf_counter()
+        await seed_synthetic_providers(db, n)
+        await server.ensure_indexes()
+        print(f"   seeded and indexed in {time.perf_counter() - start:.1f} s")
+
+        rng = random.Random(7)
+        latencies = []
+        results = 0
+        for _ in range(queries):
+            lat, lng = random_point(rng)
+            query = {"availability": {"$ne": "offline"}, "categories": rng.choice(CATEGORIES)}
+            start = time.perf_counter()
+            found = await server.search_providers_near(query, lat, lng, radius_km)
+            latencies.append((time.perf_counter() - start) * 1000)
+            results += len(found)
+
+        p50, p95, p99 = percentiles(latencies)
+        print(f"   p50 {p50:.2f} ms  p95 {p95:.2f} ms  p99 {p99:.2f} ms  "
+              f"avg results {results / queries:.1f}")
+    finally:
+        await db.client.drop_database(BENCH_DB)
+        client.close()
+
+
+# ============ HTTP CLIENTS (per-call vs shared pooled client) ============
+
+class StandInServer:
+    """Local HTTPS server standing in for an upstream API (e.g. Emergent Auth).
+
+    Runs uvicorn on its own thread and event loop with a throwaway self-signed
+    certificate, and records the client port of every request so the number of
+    distinct TCP connections can be reported."""
+
+    def __init__(self, port):
+        self.port = port
+        self.client_ports = set()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cert = os.path.join(self.tmp.name, "cert.pem")
+        self.key = os.path.join(self.tmp.name, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+             "-keyout", self.key, "-out", self.cert],
+            check=True, capture_output=True
+        )
+        # interface is explicit: uvicorn would mistake the bound method for an ASGI2 app
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning",
+                                interface="asgi3", ssl_certfile=self.cert, ssl_keyfile=self.key)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    async def app(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.client_ports.add(scope["client"][1])
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"email": "bench@example.com", "name": "Bench"}'})
+
+    @property
+    def url(self):
+        return f"https://127.0.0.1:{self.port}/session-data"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+        self.tmp.cleanup()
+
+
+async def run_http_load(upstream, requests, concurrency, get):
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            response = await get(upstream.url)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    upstream.client_ports.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start, len(upstream.client_ports)
+
+
+def print_http_row(label, latencies, elapsed, connections):
+    p50, p95, p99 = percentiles(latencies)
+    print(f"   {label:<28} {len(latencies) / elapsed:>8.0f} req/s  connections {connections:>5}  "
+          f"p50 {p50:>7.2f} ms  p95 {p95:>7.2f} ms  p99 {p99:>7.2f} ms")
+
+
+async def bench_http_clients(requests, concurrency, port):
+    print(f"📊 {requests} HTTPS calls to a local stand-in upstream, {concurrency} concurrent "
+          f"(http2: {server.http2_available()})")
+    with StandInServer(port) as upstream:
+        async def per_call(url):
+            # What handle_oauth_session used to do: a new client, and handshake, per call
+            async with httpx.AsyncClient(verify=upstream.cert) as http:
+                return await http.get(url)
+
+        print_http_row("before (client per call)", *await run_http_load(upstream, requests, concurrency, per_call))
+
+        shared = server.create_http_client(verify=upstream.cert)
+        try:
+            print_http_row("after (shared pooled client)", *await run_http_load(upstream, requests, concurrency, shared.get))
+        finally:
+            await shared.aclose()
+
+
+# ============ AVAILABILITY (indexed free-window lookup) ============
+
+def synthetic_calendar_day(rng, provider_id, categories, provider_fields, date):
+    """Zero to three free ranges between 08:00 and 20:00, on half-hour boundaries"""
+    free = []
+    for _ in range(rng.randint(0, 3)):
+        start = rng.randrange(16, 38) * 30
+        free.append([start, min(start + rng.randrange(2, 9) * 30, 1200)])
+    free = server.merge_intervals(free)
+    if not free:
+        return None
+    return {
+        "provider_id": provider_id,
+        "day": date.strftime("%Y-%m-%d"),
+        "date": date,
+        "free": free,
+        "slots": server.availability_slots(free, categories),
+        **provider_fields,
+    }
+
+
+async def seed_calendars(db, providers, days, chunk=10000):
+    rng = random.Random(42)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = [today + timedelta(days=d) for d in range(days)]
+    batch = []
+    total = 0
+    for i in range(providers):
+        categories = rng.sample(CATEGORIES, rng.randint(1, 3))
+        provider_fields = server.availability_provider_fields({
+            "rank_score": round(rng.random(), 6),
+            "availability": rng.choice(["available", "available", "busy", "offline"]),
+        })
+        for date in dates:
+            doc = synthetic_calendar_day(rng, f"prov_cal{i:07d}", categories, provider_fields, date)
+            if doc:
+                batch.append(doc)
+            if len(batch) >= chunk:
+                await db.availability_slots.insert_many(batch)
+                total += len(batch)
+                batch = []
+    if batch:
+        await db.availability_slots.insert_many(batch)
+        total += len(batch)
+    return dates, total
+
+
+def random_window(rng, dates):
+    date = rng.choice(dates)
+    start = rng.randrange(16, 38) * 30
+    return date.strftime("%Y-%m-%d"), start, start + rng.choice([30, 60, 120])
+
+
+async def python_scan(db, category, day, start, end, limit):
+    # The approach the index replaces: load the day's calendars and check them in Python
+    found = []
+    async for doc in db.availability_slots.find({"day": day}, {"_id": 0}):
+        if not doc["offline"] and any(
+            s["category_id"] == category and s["start"] <= start and s["end"] >= end for s in doc["slots"]
+        ):
+            found.append((-doc["rank_score"], doc["provider_id"]))
+    return [provider_id for _, provider_id in sorted(found)[:limit]]
+
+
+async def bench_availability(providers, days, queries, scan_queries, limit):
+    client, db, _ = connect()
+    print(f"📊 Free-window provider lookup over {providers} providers x {days} days")
+    try:
+        start = time.perf_counter()
+        dates, docs = await seed_calendars(db, providers, days)
+        await server.ensure_indexes()
+        print(f"   seeded {docs} provider-days and indexed in {time.perf_counter() - start:.1f} s")
+
+        rng = random.Random(7)
+        for label, runs, lookup in (
+            ("python scan of the day", scan_queries, python_scan),
+            ("indexed $elemMatch", queries, lambda db, *args: server.find_free_provider_ids(*args)),
+        ):
+            latencies = []
+            results = 0
+            for _ in range(runs):
+                category = rng.choice(CATEGORIES)
+                day, window_start, window_end = random_window(rng, dates)
+                started = time.perf_counter()
+                found = await lookup(db, category, day, window_start, window_end, limit)
+                latencies.append((time.perf_counter() - started) * 1000)
+                results += len(found)
+            p50, p95, p99 = percentiles(latencies)
+            print(f"   {label:<28} p50 {p50:>8.2f} ms  p95 {p95:>8.2f} ms  p99 {p99:>8.2f} ms  "
+                  f"avg results {results / runs:.1f}  ({runs} queries)")
+    finally:
+        await db.client.drop_database(BENCH_DB)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    providers = sub.add_parser("providers", help="N+1 vs batched provider enrichment")
+    providers.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+
+    storm_parser = sub.add_parser("login-storm", help="event loop latency while bcrypt runs")
+    storm_parser.add_argument("--logins", type=int, default=50)
+
+    geo = sub.add_parser("geo", help="$geoNear provider search latency")
+    geo.add_argument("--providers", type=int, default=100000)
+    geo.add_argument("--queries", type=int, default=500)
+    geo.add_argument("--radius-km", type=float, default=10)
+
+    http_clients = sub.add_parser("http-clients", help="per-call vs shared outbound HTTP client")
+    http_clients.add_argument("--requests", type=int, default=2000)
+    http_clients.add_argument("--concurrency", type=int, default=50)
+    http_clients.add_argument("--port", type=int, default=8443)
+
+    availability = sub.add_parser("availability", help="free-window provider lookup latency")
+    availability.add_argument("--providers", type=int, default=50000)
+    availability.add_argument("--days", type=int, default=90)
+    availability.add_argument("--queries", type=int, default=500)
+    availability.add_argument("--scan-queries", type=int, default=20)
+    availability.add_argument("--limit", type=int, default=50)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "providers":
+        asyncio.run(bench_providers(args.sizes))
+    elif args.benchmark == "login-storm":
+        asyncio.run(bench_login_storm(args.logins))
+    elif args.benchmark == "geo":
+        asyncio.run(bench_geo(args.providers, args.queries, args.radius_km))
+    elif args.benchmark == "http-clients":
+        asyncio.run(bench_http_clients(args.requests, args.concurrency, args.port))
+    elif args.benchmark == "availability":
+        asyncio.run(bench_availability(args.providers, args.days, args.queries, args.scan_queries, args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
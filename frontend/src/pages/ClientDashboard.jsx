@@ -13,16 +13,23 @@ export default function ClientDashboard() {
   const navigate = useNavigate();
   
   const [requests, setRequests] = useState([]);
+  const [statusCounts, setStatusCounts] = useState({});
+  const [unread, setUnread] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchRequests = async () => {
       const token = localStorage.getItem("hmn_token");
       try {
-        const response = await axios.get(`${API}/requests`, {
+        const response = await axios.get(`${API}/dashboard`, {
           headers: { Authorization: `Bearer ${token}` }
         });
-        setRequests(response.data);
+        setRequests(response.data.requests);
+        setStatusCounts(response.data.status_counts || {});
+        setNextCursor(response.data.next_cursor);
+        setUnread(response.data.unread?.by_request || {});
       } catch (error) {
         console.error("Error fetching requests:", error);
       } finally {
@@ -32,6 +39,23 @@ export default function ClientDashboard() {
     fetchRequests();
   }, []);
 
+  const loadMoreRequests = async () => {
+    const token = localStorage.getItem("hmn_token");
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(
+        `${API}/requests?view=summary&cursor=${encodeURIComponent(nextCursor)}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setRequests(prev => [...prev, ...response.data.requests]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error("Error fetching requests:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const getStatusColor = (status) => {
     const colors = {
       pending: "bg-[#D69E2E]/10 text-[#D69E2E]",
@@ -99,7 +123,7 @@ export default function ClientDashboard() {
                 </div>
                 <div>
                   <p className="text-2xl font-bold text-[#1A202C]">
-                    {requests.filter(r => r.status === "pending").length}
+                    {statusCounts.pending || 0}
                   </p>
                   <p className="text-sm text-[#718096]">
                     {language === "es" ? "Pendientes" : "Pending"}
@@ -117,7 +141,7 @@ export default function ClientDashboard() {
                 </div>
                 <div>
                   <p className="text-2xl font-bold text-[#1A202C]">
-                    {requests.filter(r => ["accepted", "in_progress"].includes(r.status)).length}
+                    {(statusCounts.accepted || 0) + (statusCounts.in_progress || 0)}
                   </p>
                   <p className="text-sm text-[#718096]">
                     {language === "es" ? "En curso" : "In progress"}
@@ -135,7 +159,7 @@ export default function ClientDashboard() {
                 </div>
                 <div>
                   <p className="text-2xl font-bold text-[#1A202C]">
-                    {requests.filter(r => r.status === "completed").length}
+                    {statusCounts.completed || 0}
                   </p>
                   <p className="text-sm text-[#718096]">
                     {language === "es" ? "Completados" : "Completed"}
@@ -201,6 +225,11 @@ export default function ClientDashboard() {
                           <Badge className={`${getStatusColor(request.status)} border-0 text-xs`}>
                             {getStatusText(request.status)}
                           </Badge>
+                          {unread[request.request_id] > 0 && (
+                            <Badge className="bg-[#0F4C75] text-white border-0 text-xs" data-testid={`unread-${request.request_id}`}>
+                              {unread[request.request_id]}
+                            </Badge>
+                          )}
                         </div>
                         <p className="text-sm text-[#718096] line-clamp-1">
                           {request.description}
@@ -221,6 +250,19 @@ export default function ClientDashboard() {
                     </div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <div className="flex justify-center pt-2">
+                    <Button
+                      variant="ghost"
+                      size="sm"
+                      onClick={loadMoreRequests}
+                      disabled={loadingMore}
+                      data-testid="load-more-requests-btn"
+                    >
+                      {language === "es" ? "Cargar más" : "Load more"}
+                    </Button>
+                  </div>
+                )}
               </div>
             )}
           </CardContent>
@@ -20,7 +20,12 @@ export default function Messages() {
   const [newMessage, setNewMessage] = useState("");
   const [loading, setLoading] = useState(true);
   const [sending, setSending] = useState(false);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const [conversations, setConversations] = useState([]);
+  const [inboxCursor, setInboxCursor] = useState(null);
   const messagesEndRef = useRef(null);
+  const skipScrollRef = useRef(false);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -39,7 +44,8 @@ export default function Messages() {
           })
         ]);
         setRequest(requestRes.data);
-        setMessages(messagesRes.data);
+        setMessages(messagesRes.data.messages);
+        setOlderCursor(messagesRes.data.has_more ? messagesRes.data.before_cursor : null);
       } catch (error) {
         console.error("Error fetching data:", error);
         toast.error(language === "es" ? "Error al cargar" : "Error loading");
@@ -51,14 +57,80 @@ export default function Messages() {
     if (requestId !== "all") {
       fetchData();
     } else {
-      setLoading(false);
+      fetchConversations(null).finally(() => setLoading(false));
     }
   }, [requestId, language]);
 
+  const fetchConversations = async (cursor) => {
+    const token = localStorage.getItem("hmn_token");
+    try {
+      const response = await axios.get(
+        `${API}/conversations${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setConversations(prev => cursor ? [...prev, ...response.data.conversations] : response.data.conversations);
+      setInboxCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error("Error fetching conversations:", error);
+      toast.error(language === "es" ? "Error al cargar" : "Error loading");
+    }
+  };
+
+  // Live updates: new messages, translations and read receipts
+  useEffect(() => {
+    if (requestId === "all") return;
+
+    const token = localStorage.getItem("hmn_token");
+    const socket = new WebSocket(
+      `${API.replace(/^http/, "ws")}/ws/messages/${requestId}?token=${encodeURIComponent(token)}`
+    );
+
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === "message") {
+        setMessages(prev => prev.some(m => m.message_id === data.message.message_id)
+          ? prev
+          : [...prev, data.message]);
+        if (data.message.sender_id !== user?.user_id) {
+          socket.send(JSON.stringify({ type: "read" }));
+        }
+      } else if (data.type === "translation") {
+        skipScrollRef.current = true;
+        setMessages(prev => prev.map(m => m.message_id === data.message_id
+          ? { ...m, translated_content: { ...m.translated_content, ...data.translated_content } }
+          : m));
+      }
+    };
+
+    return () => socket.close();
+  }, [requestId, user?.user_id]);
+
   useEffect(() => {
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
+  const loadOlderMessages = async () => {
+    const token = localStorage.getItem("hmn_token");
+    setLoadingOlder(true);
+    try {
+      const response = await axios.get(
+        `${API}/messages/${requestId}?language=${language}&before=${encodeURIComponent(olderCursor)}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      skipScrollRef.current = true;
+      setMessages(prev => [...response.data.messages, ...prev]);
+      setOlderCursor(response.data.has_more ? response.data.before_cursor : null);
+    } catch (error) {
+      toast.error(language === "es" ? "Error al cargar" : "Error loading");
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const sendMessage = async () => {
     if (!newMessage.trim()) return;
     
@@ -82,13 +154,16 @@ export default function Messages() {
         headers: { Authorization: `Bearer ${token}` }
       });
 
-      setMessages(prev => [...prev, {
-        message_id: response.data.message_id,
-        sender_id: user.user_id,
-        receiver_id: receiverId,
-        content: newMessage,
-        created_at: new Date().toISOString()
-      }]);
+      // The socket usually delivers our own message before the POST resolves
+      setMessages(prev => prev.some(m => m.message_id === response.data.message_id)
+        ? prev
+        : [...prev, {
+          message_id: response.data.message_id,
+          sender_id: user.user_id,
+          receiver_id: receiverId,
+          content: newMessage,
+          created_at: new Date().toISOString()
+        }]);
       
       setNewMessage("");
     } catch (error) {
@@ -121,21 +196,70 @@ export default function Messages() {
           <h1 className="text-2xl font-bold text-[#1A202C] mb-4">
             {t("messages", language)}
           </h1>
-          <Card className="border-slate-200">
-            <CardContent className="p-8 text-center">
-              <p className="text-[#718096]">
-                {language === "es" 
-                  ? "Selecciona una solicitud para ver los mensajes"
-                  : "Select a request to view messages"}
-              </p>
-              <Button 
-                onClick={() => navigate("/dashboard")}
-                className="mt-4 bg-[#E07A5F] hover:bg-[#E07A5F]/90 text-white"
-              >
-                {language === "es" ? "Ver solicitudes" : "View requests"}
-              </Button>
-            </CardContent>
-          </Card>
+          {loading ? (
+            <div className="animate-pulse-gentle text-[#0F4C75]">{t("loading", language)}</div>
+          ) : conversations.length === 0 ? (
+            <Card className="border-slate-200">
+              <CardContent className="p-8 text-center">
+                <p className="text-[#718096]">
+                  {language === "es" 
+                    ? "Aún no tienes conversaciones"
+                    : "You have no conversations yet"}
+                </p>
+                <Button 
+                  onClick={() => navigate("/dashboard")}
+                  className="mt-4 bg-[#E07A5F] hover:bg-[#E07A5F]/90 text-white"
+                >
+                  {language === "es" ? "Ver solicitudes" : "View requests"}
+                </Button>
+              </CardContent>
+            </Card>
+          ) : (
+            <Card className="border-slate-200">
+              <CardContent className="p-2">
+                {conversations.map((conv) => (
+                  <div
+                    key={conv.request_id}
+                    className="p-4 rounded-xl hover:bg-[#F1F5F9] transition-colors cursor-pointer"
+                    onClick={() => navigate(`/messages/${conv.request_id}`)}
+                    data-testid={`conversation-${conv.request_id}`}
+                  >
+                    <div className="flex items-center justify-between gap-2">
+                      <h3 className="font-medium text-[#1A202C] truncate">
+                        {conv.counterpart_name || conv.title}
+                      </h3>
+                      <div className="flex items-center gap-2 shrink-0">
+                        {conv.unread_count > 0 && (
+                          <Badge className="bg-[#0F4C75] text-white border-0 text-xs">
+                            {conv.unread_count}
+                          </Badge>
+                        )}
+                        <span className="text-xs text-[#A0AEC0]">
+                          {new Date(conv.updated_at).toLocaleDateString(language === "es" ? "es-ES" : "en-US")}
+                        </span>
+                      </div>
+                    </div>
+                    <p className="text-xs text-[#718096] mt-1 truncate">{conv.title}</p>
+                    <p className={`text-sm mt-1 line-clamp-1 ${conv.unread_count > 0 ? "text-[#1A202C] font-medium" : "text-[#718096]"}`}>
+                      {conv.last_message?.content}
+                    </p>
+                  </div>
+                ))}
+                {inboxCursor && (
+                  <div className="flex justify-center p-2">
+                    <Button
+                      variant="ghost"
+                      size="sm"
+                      onClick={() => fetchConversations(inboxCursor)}
+                      data-testid="load-more-conversations-btn"
+                    >
+                      {language === "es" ? "Cargar más" : "Load more"}
+                    </Button>
+                  </div>
+                )}
+              </CardContent>
+            </Card>
+          )}
         </div>
       </div>
     );
@@ -200,6 +324,19 @@ export default function Messages() {
         <Card className="border-slate-200 mb-4">
           <CardContent className="p-4">
             <div className="h-[400px] overflow-y-auto space-y-4 pr-2">
+              {olderCursor && (
+                <div className="flex justify-center">
+                  <Button
+                    variant="ghost"
+                    size="sm"
+                    onClick={loadOlderMessages}
+                    disabled={loadingOlder}
+                    data-testid="load-older-btn"
+                  >
+                    {language === "es" ? "Cargar mensajes anteriores" : "Load earlier messages"}
+                  </Button>
+                </div>
+              )}
               {messages.length === 0 ? (
                 <div className="h-full flex items-center justify-center text-[#718096]">
                   {language === "es" 
@@ -223,7 +360,7 @@ export default function Messages() {
                           <p>{msg.content}</p>
                           
                           {/* Translated content */}
-                          {msg.translated_content && Object.keys(msg.translated_content).length > 0 && (
+                          {msg.translated_content?.[language] && (
                             <div className={`mt-2 pt-2 border-t ${isOwn ? "border-white/20" : "border-slate-100"}`}>
                               <div className="flex items-center gap-1 mb-1">
                                 <Globe className="w-3 h-3 opacity-60" />
@@ -231,11 +368,9 @@ export default function Messages() {
                                   {language === "es" ? "Traducido" : "Translated"}
                                 </span>
                               </div>
-                              {Object.entries(msg.translated_content).map(([lang, text]) => (
-                                <p key={lang} className={`text-sm ${isOwn ? "text-white/80" : "text-[#718096]"}`}>
-                                  {text}
-                                </p>
-                              ))}
+                              <p className={`text-sm ${isOwn ? "text-white/80" : "text-[#718096]"}`}>
+                                {msg.translated_content[language]}
+                              </p>
                             </div>
                           )}
                         </div>
@@ -15,6 +15,11 @@ export default function ProviderDashboard() {
   const navigate = useNavigate();
   
   const [requests, setRequests] = useState([]);
+  const [statusCounts, setStatusCounts] = useState({});
+  const [unread, setUnread] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [earnings, setEarnings] = useState(0);
   const [profile, setProfile] = useState(null);
   const [loading, setLoading] = useState(true);
   const [availability, setAvailability] = useState("available");
@@ -23,18 +28,17 @@ export default function ProviderDashboard() {
     const fetchData = async () => {
       const token = localStorage.getItem("hmn_token");
       try {
-        const [requestsRes, profileRes] = await Promise.all([
-          axios.get(`${API}/requests`, {
-            headers: { Authorization: `Bearer ${token}` }
-          }),
-          axios.get(`${API}/users/provider-profile`, {
-            headers: { Authorization: `Bearer ${token}` }
-          })
-        ]);
-        setRequests(requestsRes.data);
-        if (profileRes.data) {
-          setProfile(profileRes.data);
-          setAvailability(profileRes.data.availability || "available");
+        const response = await axios.get(`${API}/dashboard`, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        setRequests(response.data.requests);
+        setStatusCounts(response.data.status_counts || {});
+        setNextCursor(response.data.next_cursor);
+        setUnread(response.data.unread?.by_request || {});
+        setEarnings(response.data.earnings?.total || 0);
+        if (response.data.provider_profile) {
+          setProfile(response.data.provider_profile);
+          setAvailability(response.data.provider_profile.availability || "available");
         }
       } catch (error) {
         console.error("Error fetching data:", error);
@@ -66,6 +70,23 @@ export default function ProviderDashboard() {
     }
   };
 
+  const loadMoreRequests = async () => {
+    const token = localStorage.getItem("hmn_token");
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(
+        `${API}/requests?view=summary&cursor=${encodeURIComponent(nextCursor)}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setRequests(prev => [...prev, ...response.data.requests]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error("Error fetching requests:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const getStatusColor = (status) => {
     const colors = {
       pending: "bg-[#D69E2E]/10 text-[#D69E2E]",
@@ -89,6 +110,10 @@ export default function ProviderDashboard() {
       setRequests(prev => prev.map(r => 
         r.request_id === requestId ? { ...r, status: "accepted" } : r
       ));
+      setStatusCounts(prev => {
+        const previous = requests.find(r => r.request_id === requestId)?.status || "pending";
+        return { ...prev, [previous]: Math.max(0, (prev[previous] || 0) - 1), accepted: (prev.accepted || 0) + 1 };
+      });
       
       toast.success(language === "es" ? "Solicitud aceptada" : "Request accepted");
     } catch (error) {
@@ -96,10 +121,6 @@ export default function ProviderDashboard() {
     }
   };
 
-  const earnings = requests
-    .filter(r => r.status === "completed" && r.price_agreed)
-    .reduce((sum, r) => sum + r.price_agreed, 0);
-
   return (
     <div className="min-h-[calc(100vh-64px)] bg-[#F9F9F9]" data-testid="provider-dashboard">
       <div className="max-w-6xl mx-auto px-4 sm:px-6 lg:px-8 py-8">
@@ -150,7 +171,7 @@ export default function ProviderDashboard() {
                 </div>
                 <div>
                   <p className="text-2xl font-bold text-[#1A202C]">
-                    {requests.filter(r => r.status === "pending").length}
+                    {statusCounts.pending || 0}
                   </p>
                   <p className="text-sm text-[#718096]">
                     {language === "es" ? "Nuevas" : "New"}
@@ -168,7 +189,7 @@ export default function ProviderDashboard() {
                 </div>
                 <div>
                   <p className="text-2xl font-bold text-[#1A202C]">
-                    {requests.filter(r => ["accepted", "in_progress"].includes(r.status)).length}
+                    {(statusCounts.accepted || 0) + (statusCounts.in_progress || 0)}
                   </p>
                   <p className="text-sm text-[#718096]">
                     {language === "es" ? "Activas" : "Active"}
@@ -186,7 +207,7 @@ export default function ProviderDashboard() {
                 </div>
                 <div>
                   <p className="text-2xl font-bold text-[#1A202C]">
-                    {requests.filter(r => r.status === "completed").length}
+                    {statusCounts.completed || 0}
                   </p>
                   <p className="text-sm text-[#718096]">
                     {language === "es" ? "Completadas" : "Completed"}
@@ -262,6 +283,11 @@ export default function ProviderDashboard() {
                           <Badge className={`${getStatusColor(request.status)} border-0 text-xs`}>
                             {request.status}
                           </Badge>
+                          {unread[request.request_id] > 0 && (
+                            <Badge className="bg-[#0F4C75] text-white border-0 text-xs" data-testid={`unread-${request.request_id}`}>
+                              {unread[request.request_id]}
+                            </Badge>
+                          )}
                           {request.urgency === "urgent" && (
                             <Badge className="bg-[#E53E3E]/10 text-[#E53E3E] border-0 text-xs">
                               {language === "es" ? "Urgente" : "Urgent"}
@@ -298,6 +324,19 @@ export default function ProviderDashboard() {
                     </div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <div className="flex justify-center pt-2">
+                    <Button
+                      variant="ghost"
+                      size="sm"
+                      onClick={loadMoreRequests}
+                      disabled={loadingMore}
+                      data-testid="load-more-requests-btn"
+                    >
+                      {language === "es" ? "Cargar más" : "Load more"}
+                    </Button>
+                  </div>
+                )}
               </div>
             )}
           </CardContent>
@@ -0,0 +1,22 @@
+"""Shared fixtures for backend unit tests"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "helpmynew_test")
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import server  # noqa: E402
+
+from tests.fakes import FakeDatabase  # noqa: E402
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(server, "db", db)
+    return db
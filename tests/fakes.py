@@ -0,0 +1,229 @@
+"""In-memory stand-ins for the Motor collections the backend uses.
+
+They understand just the query and update operators the code under test
+relies on; there is no MongoDB in unit tests.
+"""
+
+import asyncio
+import copy
+
+from pymongo import UpdateMany
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import UpdateResult
+
+
+def get_path(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def set_path(doc, path, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def compare(value, op, operand):
+    if op == "$eq":
+        return value == operand or (isinstance(value, list) and operand in value)
+    if op == "$ne":
+        return not compare(value, "$eq", operand)
+    if op == "$in":
+        return any(compare(value, "$eq", item) for item in operand)
+    if op == "$nin":
+        return not compare(value, "$in", operand)
+    if op == "$exists":
+        return (value is not None) == operand
+    if op == "$not":
+        return not match_condition(value, operand)
+    if op == "$elemMatch":
+        return isinstance(value, list) and any(matches(item, operand) for item in value)
+    if value is None:
+        return False
+    return {
+        "$lt": value < operand,
+        "$lte": value <= operand,
+        "$gt": value > operand,
+        "$gte": value >= operand,
+    }[op]
+
+
+def match_condition(value, condition):
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        return all(compare(value, op, operand) for op, operand in condition.items())
+    return compare(value, "$eq", condition)
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif not match_condition(get_path(doc, key), condition):
+            return False
+    return True
+
+
+def strip_id(doc):
+    return {k: v for k, v in doc.items() if k != "_id"}
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.limit_count = 0
+
+    def sort(self, keys, direction=None):
+        if isinstance(keys, str):
+            keys = [(keys, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda doc: get_path(doc, field), reverse=order < 0)
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def results(self):
+        return self.docs[:self.limit_count] if self.limit_count else self.docs
+
+    async def to_list(self, length):
+        docs = self.results()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for doc in self.results():
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, unique=None):
+        self.docs = []
+        self.unique = unique
+
+    def check_unique(self, doc):
+        for field in ("_id", self.unique):
+            if field and field in doc and any(existing.get(field) == doc[field] for existing in self.docs):
+                raise DuplicateKeyError(f"duplicate {field}")
+
+    async def insert_one(self, doc, session=None):
+        self.check_unique(doc)
+        doc.setdefault("_id", len(self.docs) + 1)
+        self.docs.append(copy.deepcopy(doc))
+
+    def find(self, query=None, projection=None, session=None):
+        return FakeCursor([strip_id(copy.deepcopy(doc)) for doc in self.docs if matches(doc, query or {})])
+
+    async def find_one(self, query=None, projection=None, session=None):
+        for doc in self.docs:
+            if matches(doc, query or {}):
+                return strip_id(copy.deepcopy(doc))
+        return None
+
+    def apply(self, doc, update, inserting):
+        for field, value in update.get("$set", {}).items():
+            set_path(doc, field, value)
+        for field, value in update.get("$inc", {}).items():
+            set_path(doc, field, (get_path(doc, field) or 0) + value)
+        if inserting:
+            doc.update(update.get("$setOnInsert", {}))
+
+    async def update_one(self, query, update, upsert=False, session=None):
+        return self.update(query, update, upsert, many=False)
+
+    async def update_many(self, query, update, upsert=False, session=None):
+        return self.update(query, update, upsert, many=True)
+
+    def update(self, query, update, upsert, many):
+        matched = [doc for doc in self.docs if matches(doc, query)]
+        if not many:
+            matched = matched[:1]
+        for doc in matched:
+            self.apply(doc, update, inserting=False)
+        if matched or not upsert:
+            return UpdateResult({"n": len(matched), "nModified": len(matched)}, True)
+        doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        self.apply(doc, update, inserting=True)
+        self.check_unique(doc)
+        doc.setdefault("_id", len(self.docs) + 1)
+        self.docs.append(doc)
+        return UpdateResult({"n": 0, "nModified": 0, "upserted": doc["_id"]}, True)
+
+    async def delete_one(self, query, session=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                self.docs.remove(doc)
+                return
+
+    async def bulk_write(self, requests, ordered=True, session=None):
+        for request in requests:
+            self.update(request._filter, request._doc, request._upsert, many=isinstance(request, UpdateMany))
+
+
+class FakeDatabase:
+    def __init__(self, **collections):
+        self.collections = collections
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+class FakeChangeStream:
+    def __init__(self, collection, resume_after):
+        self.collection = collection
+        self.queue = asyncio.Queue()
+        self.resume_token = resume_after
+        start = resume_after["_data"] if resume_after else len(collection.docs)
+        for position, doc in enumerate(collection.docs[start:], start + 1):
+            self.queue.put_nowait(collection.change(position, doc))
+
+    async def __aenter__(self):
+        self.collection.streams.append(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.collection.streams.remove(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        change = await self.queue.get()
+        self.resume_token = change["_id"]
+        return change
+
+
+class FakeChangeStreamCollection(FakeCollection):
+    """Collection whose watch() streams inserts to every open change stream"""
+
+    def __init__(self):
+        super().__init__()
+        self.streams = []
+
+    def change(self, position, doc):
+        return {"_id": {"_data": position}, "operationType": "insert", "fullDocument": copy.deepcopy(doc)}
+
+    async def insert_one(self, doc, session=None):
+        await super().insert_one(doc, session=session)
+        for stream in self.streams:
+            stream.queue.put_nowait(self.change(len(self.docs), self.docs[-1]))
+
+    def watch(self, pipeline=None, resume_after=None):
+        return FakeChangeStream(self, resume_after)
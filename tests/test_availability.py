@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+@pytest.mark.parametrize("intervals, merged", [
+    ([], []),
+    ([[60, 120], [90, 180]], [[60, 180]]),
+    ([[60, 120], [120, 180]], [[60, 180]]),
+    ([[60, 120], [121, 180]], [[60, 120], [121, 180]]),
+    ([[300, 400], [0, 60], [30, 90], [100, 350]], [[0, 90], [100, 400]]),
+    ([[0, 600], [60, 120]], [[0, 600]]),
+    ([[1380, 1440], [1200, 1380]], [[1200, 1440]]),
+])
+def test_merge_intervals(intervals, merged):
+    assert server.merge_intervals(intervals) == merged
+
+
+@pytest.mark.parametrize("value, minutes", [("00:00", 0), ("09:30", 570), ("23:59", 1439), ("24:00", 1440)])
+def test_parse_minutes(value, minutes):
+    assert server.parse_minutes(value) == minutes
+
+
+@pytest.mark.parametrize("value", ["24:01", "25:00", "10:60", "-1:00", "9", "nine:00", None])
+def test_parse_minutes_rejects_invalid_times(value):
+    with pytest.raises(HTTPException) as excinfo:
+        server.parse_minutes(value)
+    assert excinfo.value.status_code == 400
+
+
+def slot_day(provider_id, slots, rank_score=0, offline=False, day="2024-05-01"):
+    return {
+        "provider_id": provider_id,
+        "day": day,
+        "rank_score": rank_score,
+        "offline": offline,
+        "slots": [{"category_id": "cat_plumbing", "start": start, "end": end} for start, end in slots]
+    }
+
+
+@pytest.fixture
+def availability_db(fake_db, monkeypatch):
+    async def category_filter(category_id):
+        return category_id
+
+    monkeypatch.setattr(server, "category_filter", category_filter)
+    days = [
+        slot_day("prov_evening", [[1080, 1440]], rank_score=2),
+        slot_day("prov_morning", [[480, 720]], rank_score=5),
+        slot_day("prov_allday", [[0, 1440]], rank_score=1),
+        slot_day("prov_offline", [[0, 1440]], rank_score=9, offline=True),
+        slot_day("prov_tomorrow", [[0, 1440]], rank_score=9, day="2024-05-02"),
+    ]
+    for doc in days:
+        asyncio.run(fake_db.availability_slots.insert_one(doc))
+    for provider_id in ("prov_evening", "prov_morning", "prov_allday"):
+        asyncio.run(fake_db.providers.insert_one({"provider_id": provider_id, "user_id": f"user_{provider_id}"}))
+        asyncio.run(fake_db.users.insert_one({"user_id": f"user_{provider_id}", "name": provider_id, "email": f"{provider_id}@example.com"}))
+    return fake_db
+
+
+def free_ids(start, end, limit=10):
+    return asyncio.run(server.find_free_provider_ids("cat_plumbing", "2024-05-01", start, end, limit))
+
+
+def test_free_providers_cover_the_whole_window_and_are_ranked(availability_db):
+    assert free_ids(480, 720) == ["prov_morning", "prov_allday"]
+    assert free_ids(700, 740) == ["prov_allday"]
+    assert free_ids(1380, 1440) == ["prov_evening", "prov_allday"]
+
+
+def test_free_providers_are_limited_after_ranking(availability_db):
+    assert free_ids(600, 660, limit=1) == ["prov_morning"]
+
+
+def test_available_providers_for_a_window_ending_at_midnight(availability_db):
+    providers = asyncio.run(server.get_available_providers(
+        "cat_plumbing", "2024-05-01T23:00:00Z", "2024-05-02T00:00:00Z"
+    ))
+    assert [provider["provider_id"] for provider in providers] == ["prov_evening", "prov_allday"]
+
+
+def test_available_providers_rounds_the_window_outwards(availability_db):
+    providers = asyncio.run(server.get_available_providers(
+        "cat_plumbing", "2024-05-01T07:59:30Z", "2024-05-01T09:00:00Z"
+    ))
+    assert [provider["provider_id"] for provider in providers] == ["prov_allday"]
+
+
+@pytest.mark.parametrize("start, end, detail", [
+    ("2024-05-01T10:00:00Z", "2024-05-01T10:00:00Z", "end must be after start"),
+    ("2024-05-01T10:00:00Z", "2024-05-01T09:00:00Z", "end must be after start"),
+    ("2024-05-01T23:00:00Z", "2024-05-02T00:01:00Z", "Window must fall within a single (UTC) day"),
+])
+def test_available_providers_rejects_bad_windows(availability_db, start, end, detail):
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(server.get_available_providers("cat_plumbing", start, end))
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == detail
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_lease_is_held_until_released(fake_db):
+    owner = asyncio.run(server.acquire_lease("job", 60))
+
+    assert owner
+    assert asyncio.run(server.acquire_lease("job", 60)) is None
+
+    asyncio.run(server.release_lease("job", "someone_else"))
+    assert asyncio.run(server.acquire_lease("job", 60)) is None
+
+    asyncio.run(server.release_lease("job", owner))
+    assert asyncio.run(server.acquire_lease("job", 60))
+
+
+def test_lapsed_lease_can_be_taken_over(fake_db):
+    asyncio.run(fake_db.leases.insert_one({
+        "_id": "job",
+        "owner": "dead_worker",
+        "expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)
+    }))
+
+    owner = asyncio.run(server.acquire_lease("job", 60))
+
+    assert owner
+    assert [lease["owner"] for lease in fake_db.leases.docs] == [owner]
+
+
+def test_backfill_skips_while_another_worker_rebuilds(fake_db, monkeypatch):
+    rebuilds = []
+
+    async def rebuild():
+        rebuilds.append(1)
+        return 0
+
+    monkeypatch.setattr(server, "rebuild_earnings_rollups", rebuild)
+    owner = asyncio.run(server.acquire_lease("earnings_rollups_rebuild", 60))
+
+    assert asyncio.run(server.backfill_earnings_rollups()) is None
+    assert rebuilds == []
+
+    asyncio.run(server.release_lease("earnings_rollups_rebuild", owner))
+    assert asyncio.run(server.backfill_earnings_rollups()) == 0
+    assert rebuilds == [1]
+    assert fake_db.leases.docs == []
+
+
+def test_admin_backfill_reports_a_rebuild_in_progress(fake_db):
+    asyncio.run(server.acquire_lease("earnings_rollups_rebuild", 60))
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(server.run_earnings_backfill({"role": "admin"}))
+    assert excinfo.value.status_code == 409
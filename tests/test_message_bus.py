@@ -0,0 +1,101 @@
+import asyncio
+
+import server
+from tests.fakes import FakeChangeStreamCollection
+
+
+EVENT = {"type": "message", "message": {"message_id": "msg_1"}}
+
+
+def test_in_process_bus_delivers_to_channel_subscribers_only():
+    async def scenario():
+        bus = server.InProcessMessageBus()
+        queue = bus.subscribe("request:req_1")
+        other = bus.subscribe("request:req_2")
+
+        await bus.publish("request:req_1", EVENT)
+
+        assert queue.get_nowait() == EVENT
+        assert other.empty()
+
+    asyncio.run(scenario())
+
+
+def test_in_process_bus_unsubscribe_forgets_empty_channels():
+    async def scenario():
+        bus = server.InProcessMessageBus()
+        queue = bus.subscribe("request:req_1")
+        bus.unsubscribe("request:req_1", queue)
+
+        await bus.publish("request:req_1", EVENT)
+
+        assert queue.empty()
+        assert bus.subscribers == {}
+
+    asyncio.run(scenario())
+
+
+def test_in_process_bus_drops_events_for_full_queues(monkeypatch):
+    monkeypatch.setattr(server, "MESSAGE_BUS_SUBSCRIBER_QUEUE", 1)
+
+    async def scenario():
+        bus = server.InProcessMessageBus()
+        queue = bus.subscribe("request:req_1")
+
+        await bus.publish("request:req_1", EVENT)
+        await bus.publish("request:req_1", EVENT)
+
+        assert queue.qsize() == 1
+        assert bus.dropped == 1
+
+    asyncio.run(scenario())
+
+
+def test_change_stream_bus_delivers_across_workers(fake_db):
+    fake_db.collections["message_events"] = FakeChangeStreamCollection()
+
+    async def scenario():
+        publisher, listener = server.MongoChangeStreamBus(), server.MongoChangeStreamBus()
+        own = publisher.subscribe("request:req_1")
+        remote = listener.subscribe("request:req_1")
+        await publisher.start()
+        await listener.start()
+        await asyncio.sleep(0)
+
+        await publisher.publish("request:req_1", EVENT)
+
+        try:
+            assert await asyncio.wait_for(own.get(), 1) == EVENT
+            assert await asyncio.wait_for(remote.get(), 1) == EVENT
+        finally:
+            await publisher.stop()
+            await listener.stop()
+
+    asyncio.run(scenario())
+
+
+def test_change_stream_bus_resumes_after_last_seen_event(fake_db):
+    events = fake_db.collections["message_events"] = FakeChangeStreamCollection()
+
+    async def scenario():
+        bus = server.MongoChangeStreamBus()
+        queue = bus.subscribe("request:req_1")
+        await bus.start()
+        await asyncio.sleep(0)
+        await bus.publish("request:req_1", {"n": 1})
+        assert await asyncio.wait_for(queue.get(), 1) == {"n": 1}
+
+        # Simulate a dropped stream: events published meanwhile are replayed
+        # from the stored resume token once the watch loop reconnects.
+        await bus.stop()
+        await asyncio.sleep(0)
+        await events.insert_one({"channel": "request:req_1", "event": {"n": 2}})
+        await bus.start()
+
+        try:
+            assert await asyncio.wait_for(queue.get(), 1) == {"n": 2}
+            assert queue.empty()
+        finally:
+            await bus.stop()
+
+    asyncio.run(scenario())
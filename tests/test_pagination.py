@@ -0,0 +1,44 @@
+import pytest
+from fastapi import HTTPException
+
+import server
+from tests.fakes import matches
+
+
+ROWS = [
+    {"created_at": "2024-05-01T10:00:00", "message_id": f"msg_{suffix}"}
+    for suffix in ("a", "b", "c")
+] + [
+    {"created_at": "2024-05-01T09:00:00", "message_id": "msg_z"},
+    {"created_at": "2024-05-01T11:00:00", "message_id": "msg_0"},
+]
+
+
+def past(values, op):
+    query = server.keyset_filter(["created_at", "message_id"], values, op)
+    return sorted(row["message_id"] for row in ROWS if matches(row, query))
+
+
+def test_keyset_filter_lt_breaks_ties_on_second_field():
+    assert past(["2024-05-01T10:00:00", "msg_b"], "$lt") == ["msg_a", "msg_z"]
+
+
+def test_keyset_filter_gt_breaks_ties_on_second_field():
+    assert past(["2024-05-01T10:00:00", "msg_b"], "$gt") == ["msg_0", "msg_c"]
+
+
+def test_keyset_filter_excludes_the_cursor_row_itself():
+    assert "msg_b" not in past(["2024-05-01T10:00:00", "msg_b"], "$lt")
+    assert "msg_b" not in past(["2024-05-01T10:00:00", "msg_b"], "$gt")
+
+
+def test_cursor_round_trip():
+    values = ["2024-05-01T10:00:00", "msg_b"]
+    assert server.decode_cursor(server.encode_cursor(values), 2) == values
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", server.encode_cursor(["only one"]), server.encode_cursor({"a": 1})])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        server.decode_cursor(cursor, 2)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import server
+from tests.fakes import FakeCollection
+
+
+class FakeSession:
+    def __init__(self, transactions):
+        self.transactions = transactions
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def with_transaction(self, callback):
+        if not self.transactions:
+            raise OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", 20)
+        return await callback(self)
+
+
+class FakeClient:
+    def __init__(self, transactions):
+        self.transactions = transactions
+
+    async def start_session(self):
+        return FakeSession(self.transactions)
+
+
+class FakeStripeCheckout:
+    async def handle_webhook(self, body, signature):
+        return SimpleNamespace(
+            event_id="evt_1",
+            event_type="checkout.session.completed",
+            session_id="cs_1",
+            payment_status="paid"
+        )
+
+
+class FakeWebhookRequest:
+    headers = {"Stripe-Signature": "t=1,v1=sig"}
+
+    async def body(self):
+        return b"{}"
+
+
+@pytest.fixture(params=[True, False], ids=["transaction", "standalone"])
+def payments_db(request, fake_db, monkeypatch):
+    monkeypatch.setattr(server, "client", FakeClient(transactions=request.param))
+    monkeypatch.setattr(server, "get_stripe_checkout", lambda *args: FakeStripeCheckout())
+    monkeypatch.setattr(server, "payment_event_stats", dict.fromkeys(server.payment_event_stats, 0))
+    fake_db.collections["stripe_events"] = FakeCollection(unique="event_key")
+    asyncio.run(fake_db.payment_transactions.insert_one({
+        "session_id": "cs_1",
+        "request_id": "req_1",
+        "provider_id": "prov_1",
+        "amount": 25.0,
+        "currency": "EUR",
+        "status": "pending"
+    }))
+    asyncio.run(fake_db.requests.insert_one({"request_id": "req_1", "category_id": "cat_1", "status": "accepted"}))
+    return fake_db
+
+
+def rollup_totals(db):
+    return sorted((r["dimension"], r["period"], r["total"], r["payments"]) for r in db.earnings_rollups.docs)
+
+
+def test_replayed_webhook_is_processed_once(payments_db, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(server, "payment_event_queue", asyncio.Queue())
+        worker = asyncio.create_task(server.payment_event_worker())
+        try:
+            assert await server.stripe_webhook(FakeWebhookRequest()) == {"status": "accepted"}
+            assert await server.stripe_webhook(FakeWebhookRequest()) == {"status": "duplicate"}
+            await server.payment_event_queue.join()
+
+            # A stray re-queue (e.g. from the sweeper) finds nothing left to do
+            server.enqueue_payment_event("evt_1")
+            await server.payment_event_queue.join()
+        finally:
+            worker.cancel()
+
+    asyncio.run(scenario())
+
+    assert len(payments_db.stripe_events.docs) == 1
+    assert payments_db.stripe_events.docs[0]["status"] == "processed"
+    assert server.payment_event_stats["received"] == 1
+    assert server.payment_event_stats["duplicates"] == 1
+    assert server.payment_event_stats["processed"] == 1
+    assert payments_db.payment_transactions.docs[0]["status"] == "completed"
+    assert payments_db.requests.docs[0]["status"] == "completed"
+    assert rollup_totals(payments_db) == [
+        ("category", "day", 25.0, 1),
+        ("category", "month", 25.0, 1),
+        ("provider", "day", 25.0, 1),
+        ("provider", "month", 25.0, 1),
+    ]
+
+
+def test_completing_a_payment_twice_counts_earnings_once(payments_db):
+    assert asyncio.run(server.apply_payment_status("cs_1", "paid")) is True
+    totals = rollup_totals(payments_db)
+
+    assert asyncio.run(server.apply_payment_status("cs_1", "paid")) is False
+    assert rollup_totals(payments_db) == totals
+    assert len(totals) == 4
+
+
+def test_unpaid_status_leaves_payment_pending(payments_db):
+    assert asyncio.run(server.apply_payment_status("cs_1", "unpaid")) is False
+    assert payments_db.payment_transactions.docs[0]["status"] == "pending"
+    assert payments_db.earnings_rollups.docs == []
@@ -0,0 +1,89 @@
+import asyncio
+
+import server
+
+
+def make_request(request_id, created_at, client_id="user_client", provider_id="user_provider", status="pending"):
+    return {
+        "request_id": request_id,
+        "client_id": client_id,
+        "provider_id": provider_id,
+        "status": status,
+        "created_at": created_at,
+    }
+
+
+def list_requests(user_id, status=None, cursor=None, limit=2):
+    return asyncio.run(server.list_user_requests(user_id, status, "summary", cursor, limit))
+
+
+def seed(fake_db, *requests):
+    for request in requests:
+        asyncio.run(fake_db.requests.insert_one(request))
+
+
+def test_pages_walk_ties_without_gaps_or_repeats(fake_db):
+    seed(
+        fake_db,
+        make_request("req_a", "2024-05-01T10:00:00"),
+        make_request("req_b", "2024-05-01T10:00:00"),
+        make_request("req_c", "2024-05-01T10:00:00"),
+        make_request("req_d", "2024-05-01T09:00:00"),
+        make_request("req_e", "2024-05-01T11:00:00"),
+    )
+
+    seen, cursor = [], None
+    while True:
+        page = list_requests("user_client", cursor=cursor)
+        seen += [request["request_id"] for request in page["requests"]]
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            break
+        cursor = page["next_cursor"]
+
+    assert seen == ["req_e", "req_c", "req_b", "req_a", "req_d"]
+
+
+def test_has_more_is_false_when_the_page_is_exactly_full(fake_db):
+    seed(
+        fake_db,
+        make_request("req_a", "2024-05-01T10:00:00"),
+        make_request("req_b", "2024-05-01T11:00:00"),
+    )
+
+    page = list_requests("user_client")
+
+    assert [request["request_id"] for request in page["requests"]] == ["req_b", "req_a"]
+    assert page["has_more"] is False
+    assert page["next_cursor"] is None
+
+
+def test_lists_requests_on_either_side_with_status_filter(fake_db):
+    seed(
+        fake_db,
+        make_request("req_client", "2024-05-01T10:00:00", client_id="user_me"),
+        make_request("req_provider", "2024-05-01T11:00:00", provider_id="user_me"),
+        make_request("req_done", "2024-05-01T12:00:00", client_id="user_me", status="completed"),
+        make_request("req_other", "2024-05-01T13:00:00"),
+    )
+
+    page = list_requests("user_me", status="pending", limit=10)
+
+    assert [request["request_id"] for request in page["requests"]] == ["req_provider", "req_client"]
+
+
+def test_status_filter_applies_past_the_first_page(fake_db):
+    seed(
+        fake_db,
+        make_request("req_a", "2024-05-01T10:00:00"),
+        make_request("req_b", "2024-05-01T11:00:00", status="completed"),
+        make_request("req_c", "2024-05-01T12:00:00"),
+        make_request("req_d", "2024-05-01T13:00:00"),
+    )
+
+    first = list_requests("user_provider", status="pending")
+    second = list_requests("user_provider", status="pending", cursor=first["next_cursor"])
+
+    assert [request["request_id"] for request in first["requests"]] == ["req_d", "req_c"]
+    assert [request["request_id"] for request in second["requests"]] == ["req_a"]
+    assert second["has_more"] is False
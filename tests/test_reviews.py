@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+@pytest.mark.parametrize("rating", [None, 0, 6, 4.7, 4.0, "4", True, False])
+def test_create_review_rejects_ratings_that_are_not_integers_from_1_to_5(fake_db, rating):
+    review = {"request_id": "req_1", "rating": rating}
+    if rating is None:
+        del review["rating"]
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(server.create_review(review, {"user_id": "user_client"}))
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "rating must be an integer from 1 to 5"
+
+
+@pytest.mark.parametrize("rating", [1, 5])
+def test_create_review_accepts_integer_ratings(fake_db, rating):
+    # Past validation, the missing request is the next thing to fail
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(server.create_review({"request_id": "req_1", "rating": rating}, {"user_id": "user_client"}))
+    assert excinfo.value.status_code == 404
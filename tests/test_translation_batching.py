@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+from cachetools import LRUCache
+
+import server
+
+
+class StubLLM:
+    """Stands in for call_llm: answers batches with a JSON array unless told otherwise"""
+
+    def __init__(self, batch_answer=None):
+        self.calls = []
+        self.batch_answer = batch_answer
+
+    async def __call__(self, system_message, text, segments):
+        self.calls.append((text, segments))
+        await asyncio.sleep(0)
+        if "JSON array" in system_message:
+            if self.batch_answer is not None:
+                return self.batch_answer
+            return json.dumps([f"{segment} [fr]" for segment in json.loads(text)])
+        return f"{text} [fr]"
+
+
+@pytest.fixture
+def llm(fake_db, monkeypatch):
+    stub = StubLLM()
+    monkeypatch.setattr(server, "call_llm", stub)
+    monkeypatch.setattr(server, "translation_cache", LRUCache(maxsize=100))
+    monkeypatch.setattr(server, "translation_inflight", {})
+    monkeypatch.setattr(server, "translation_batches", {})
+    monkeypatch.setattr(server, "translation_batch_stats", dict.fromkeys(server.translation_batch_stats, 0))
+    monkeypatch.setattr(server, "TRANSLATION_BATCH_WINDOW_MS", 1)
+    return stub
+
+
+def translate_all(texts, language="fr"):
+    async def scenario():
+        return await asyncio.gather(*(server.translate_text(text, language) for text in texts))
+    return asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_call_and_split_by_position(llm):
+    assert translate_all(["uno", "dos", "tres"]) == ["uno [fr]", "dos [fr]", "tres [fr]"]
+    assert llm.calls == [(json.dumps(["uno", "dos", "tres"]), 3)]
+
+
+def test_full_batch_is_flushed_before_the_window_closes(llm, monkeypatch):
+    monkeypatch.setattr(server, "TRANSLATION_BATCH_MAX_SEGMENTS", 2)
+
+    assert translate_all(["uno", "dos", "tres"]) == ["uno [fr]", "dos [fr]", "tres [fr]"]
+    assert llm.calls == [(json.dumps(["uno", "dos"]), 2), ("tres", 1)]
+
+
+def test_each_target_language_gets_its_own_batch(llm):
+    async def scenario():
+        return await asyncio.gather(server.translate_text("uno", "fr"), server.translate_text("dos", "de"))
+
+    assert asyncio.run(scenario()) == ["uno [fr]", "dos [fr]"]
+    assert sorted(llm.calls) == [("dos", 1), ("uno", 1)]
+
+
+@pytest.mark.parametrize("answer", ["not json", json.dumps(["only one"]), json.dumps({"0": "uno"})])
+def test_malformed_batch_answer_falls_back_to_one_call_per_segment(llm, answer):
+    llm.batch_answer = answer
+
+    assert translate_all(["uno", "dos"]) == ["uno [fr]", "dos [fr]"]
+    assert llm.calls == [(json.dumps(["uno", "dos"]), 2), ("uno", 1), ("dos", 1)]
+    assert server.translation_batch_stats["batch_fallbacks"] == 1
+
+
+def test_identical_inflight_requests_share_one_future(llm):
+    assert translate_all(["hola", "hola", " hola "]) == ["hola [fr]"] * 3
+    assert llm.calls == [("hola", 1)]
+    assert server.translation_batch_stats["coalesced"] == 2
+    assert server.translation_inflight == {}
+
+
+def test_translations_are_cached_and_failures_are_not(llm, fake_db, monkeypatch):
+    translate_all(["hola"])
+    translate_all(["hola"])
+    assert len(llm.calls) == 1
+    assert [doc["translated"] for doc in fake_db.translations.docs] == ["hola [fr]"]
+
+    async def unavailable(system_message, text, segments):
+        llm.calls.append((text, segments))
+        return None
+
+    monkeypatch.setattr(server, "call_llm", unavailable)
+    assert translate_all(["adios"]) == ["adios"]
+    assert translate_all(["adios"]) == ["adios"]
+    assert len(llm.calls) == 3
+    assert len(fake_db.translations.docs) == 1
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+CLIENT = {"user_id": "user_client", "preferred_language": "es", "role": "client"}
+PROVIDER = {"user_id": "user_provider", "preferred_language": "en", "role": "provider"}
+
+
+@pytest.fixture
+def messaging_db(fake_db, monkeypatch):
+    monkeypatch.setattr(server, "user_cache", {})
+    monkeypatch.setattr(server, "translation_queued", set())
+    monkeypatch.setattr(server, "translation_worker_stats", dict.fromkeys(server.translation_worker_stats, 0))
+    monkeypatch.setattr(server, "message_bus", server.InProcessMessageBus())
+    for doc in (CLIENT, PROVIDER):
+        asyncio.run(fake_db.users.insert_one(dict(doc)))
+    asyncio.run(fake_db.requests.insert_one({
+        "request_id": "req_1", "client_id": "user_client", "provider_id": "user_provider"
+    }))
+    return fake_db
+
+
+def pending_message(message_id):
+    return {
+        "message_id": message_id,
+        "request_id": "req_1",
+        "sender_id": "user_client",
+        "receiver_id": "user_provider",
+        "content": "hola",
+        "translation_status": "pending",
+        "created_at": "2024-05-01T10:00:00+00:00"
+    }
+
+
+def test_full_queue_leaves_message_pending_for_the_sweeper(messaging_db, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(server, "translation_queue", asyncio.Queue(maxsize=1))
+        server.translation_queue.put_nowait({"message_id": "msg_backlog"})
+        response = await server.send_message(
+            {"request_id": "req_1", "receiver_id": "user_provider", "content": "hola"}, dict(CLIENT)
+        )
+
+        assert response["translation_status"] == "pending"
+        assert messaging_db.messages.docs[0]["translation_status"] == "pending"
+        assert server.translation_worker_stats["dropped"] == 1
+
+        # Once there is room the sweeper queues it again
+        server.translation_queue.get_nowait()
+        monkeypatch.setattr(server, "TRANSLATION_RETRY_SECONDS", -1)
+        assert await server.requeue_pending_translations() == 1
+        assert server.translation_queue.get_nowait()["message_id"] == response["message_id"]
+
+    asyncio.run(scenario())
+
+
+def test_sweeper_skips_messages_still_waiting_in_the_queue(messaging_db, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(server, "translation_queue", asyncio.Queue(maxsize=10))
+        for message_id in ("msg_queued", "msg_lost"):
+            await messaging_db.messages.insert_one(pending_message(message_id))
+        assert server.enqueue_message_translation("msg_queued", "req_1", "hola", ["en"])
+
+        assert await server.requeue_pending_translations() == 1
+        assert await server.requeue_pending_translations() == 0
+
+        queued = [server.translation_queue.get_nowait()["message_id"] for _ in range(server.translation_queue.qsize())]
+        assert queued == ["msg_queued", "msg_lost"]
+
+    asyncio.run(scenario())
+
+
+def test_worker_forgets_message_once_processed(messaging_db, monkeypatch):
+    async def translate(content, languages):
+        return {lang: f"{content} ({lang})" for lang in languages}
+
+    monkeypatch.setattr(server, "translate_to_languages", translate)
+
+    async def scenario():
+        monkeypatch.setattr(server, "translation_queue", asyncio.Queue(maxsize=10))
+        await messaging_db.messages.insert_one(pending_message("msg_1"))
+        server.enqueue_message_translation("msg_1", "req_1", "hola", ["en"])
+        worker = asyncio.create_task(server.translation_worker())
+        try:
+            await server.translation_queue.join()
+        finally:
+            worker.cancel()
+
+    asyncio.run(scenario())
+
+    assert server.translation_queued == set()
+    assert messaging_db.messages.docs[0]["translation_status"] == "done"
+    assert messaging_db.messages.docs[0]["translated_content"] == {"en": "hola (en)"}